@@ -0,0 +1,3 @@
+"""
+Benchmarks for the SEO MCP formatters and tools
+"""
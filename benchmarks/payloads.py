@@ -0,0 +1,166 @@
+"""
+Synthetic Ahrefs payload generators used by the benchmarks
+
+Every generator is deterministic for a given row count and seed and returns
+the raw upstream document, i.e. the ``["Ok", {...}]`` list that ``response.json()``
+would produce.
+"""
+import random
+from typing import Any, Dict, List
+
+
+COUNTRIES = ["us", "gb", "de", "fr", "in", "br", "jp", "ca", "au", "es"]
+DIFFICULTY_LABELS = ["Easy", "Medium", "Hard", "Super hard", "Unknown"]
+VOLUME_LABELS = ["0-10", "10-100", "100-1K", "1K-10K", "10K-100K", "100K+"]
+WORDS = [
+    "seo", "backlink", "checker", "free", "tool", "keyword", "rank", "traffic",
+    "best", "how", "to", "guide", "audit", "site", "domain", "authority",
+    "google", "search", "content", "marketing", "link", "building", "local", "api",
+]
+
+
+def _rng(rows: int, seed: int) -> random.Random:
+    return random.Random(rows + seed * 1_000_003)
+
+
+def _phrase(rng: random.Random, min_words: int = 2, max_words: int = 5) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _domains(rng: random.Random, count: int) -> List[str]:
+    return [f"{rng.choice(WORDS)}-{rng.choice(WORDS)}{i}.com" for i in range(count)]
+
+
+def _updated_at(rng: random.Random) -> str:
+    return f"2025-0{rng.randint(1, 9)}-{rng.randint(10, 28)}T00:00:00Z"
+
+
+def backlinks_payload(rows: int, seed: int = 0) -> List[Any]:
+    """
+    Generate a stGetFreeBacklinksList response with the given number of backlinks
+    """
+    rng = _rng(rows, seed)
+    # Referring domains repeat across rows, as they do in real profiles
+    domains = _domains(rng, max(1, rows // 20))
+    backlinks = []
+    for i in range(rows):
+        ref_domain = rng.choice(domains)
+        tld = rng.random()
+        backlinks.append({
+            "anchor": _phrase(rng, 1, 4),
+            "domainRating": rng.randint(0, 100),
+            "urlRating": rng.randint(0, 100),
+            "title": _phrase(rng, 3, 8).title(),
+            "urlFrom": f"https://{ref_domain}/{_phrase(rng, 1, 3).replace(' ', '-')}/{i}",
+            "urlTo": f"https://example.com/{rng.choice(WORDS)}",
+            "edu": tld < 0.05,
+            "gov": 0.05 <= tld < 0.08,
+            "nofollow": rng.random() < 0.3,
+            "httpCode": 200,
+            "firstSeen": _updated_at(rng),
+            "lastVisited": _updated_at(rng),
+        })
+    return ["Ok", {"topBacklinks": {"backlinks": backlinks, "total": rows}}]
+
+
+def _keyword_idea(rng: random.Random, question: bool = False) -> Dict[str, Any]:
+    keyword = _phrase(rng)
+    if question:
+        keyword = f"how to {keyword}"
+    return {
+        "keyword": keyword,
+        "country": rng.choice(COUNTRIES),
+        "difficultyLabel": rng.choice(DIFFICULTY_LABELS),
+        "volumeLabel": rng.choice(VOLUME_LABELS),
+        "updatedAt": _updated_at(rng),
+        "parentTopic": _phrase(rng, 1, 2),
+    }
+
+
+def keyword_ideas_payload(rows: int, seed: int = 0) -> List[Any]:
+    """
+    Generate a stGetFreeKeywordIdeas response, three quarters regular ideas and
+    one quarter question ideas
+    """
+    rng = _rng(rows, seed)
+    questions = rows // 4
+    all_ideas = [_keyword_idea(rng) for _ in range(rows - questions)]
+    question_ideas = [_keyword_idea(rng, question=True) for _ in range(questions)]
+    return ["Ok", {
+        "allIdeas": {"results": all_ideas, "total": len(all_ideas)},
+        "questionIdeas": {"results": question_ideas, "total": len(question_ideas)},
+    }]
+
+
+def keyword_difficulty_payload(rows: int, seed: int = 0) -> List[Any]:
+    """
+    Generate a stGetFreeSerpOverviewForKeywordDifficultyChecker response with
+    the given number of SERP entries, roughly one in ten of them non-organic
+    """
+    rng = _rng(rows, seed)
+    results = []
+    for pos in range(1, rows + 1):
+        if rng.random() < 0.1:
+            results.append({"pos": pos, "content": ["ads", {"title": _phrase(rng)}]})
+            continue
+        link: Dict[str, Any] = {
+            "title": _phrase(rng, 3, 8).title(),
+            "url": ["Some", {"url": f"https://{rng.choice(WORDS)}{pos}.com/{rng.choice(WORDS)}"}],
+        }
+        if rng.random() < 0.9:
+            link["metrics"] = {
+                "domainRating": rng.randint(0, 100),
+                "urlRating": rng.randint(0, 100),
+                "traffic": rng.randint(0, 1_000_000),
+                "keywords": rng.randint(0, 50_000),
+                "topKeyword": _phrase(rng),
+                "topVolume": rng.randint(0, 100_000),
+            }
+        results.append({"pos": pos, "content": ["organic", {"link": ["Some", link]}]})
+    return ["Ok", {
+        "difficulty": rng.randint(0, 100),
+        "shortage": rng.randint(0, 100),
+        "lastUpdate": _updated_at(rng),
+        "serp": {"results": results},
+    }]
+
+
+def traffic_payload(rows: int, seed: int = 0) -> List[Any]:
+    """
+    Generate a stGetFreeTrafficOverview response, the rows being split between
+    ``top_pages`` and ``top_keywords``
+    """
+    rng = _rng(rows, seed)
+    history = [
+        {"date": f"{2020 + m // 12}-{m % 12 + 1:02d}-01", "organic": rng.randint(0, 100_000)}
+        for m in range(60)
+    ]
+    top_pages = [
+        {
+            "url": f"https://example.com/{_phrase(rng, 1, 3).replace(' ', '-')}/{i}",
+            "traffic": rng.randint(0, 100_000),
+            "share": round(rng.random() * 100, 2),
+            "keywords": rng.randint(0, 5_000),
+            "topKeyword": _phrase(rng),
+        }
+        for i in range(rows // 2)
+    ]
+    top_keywords = [
+        {
+            "keyword": _phrase(rng),
+            "position": rng.randint(1, 100),
+            "traffic": rng.randint(0, 100_000),
+            "url": f"https://example.com/{rng.choice(WORDS)}",
+        }
+        for _ in range(rows - rows // 2)
+    ]
+    top_countries = [
+        {"country": country, "share": round(rng.random() * 100, 2)} for country in COUNTRIES
+    ]
+    return ["Ok", {
+        "traffic_history": history,
+        "traffic": {"trafficMonthlyAvg": rng.randint(0, 10_000_000), "costMontlyAvg": rng.randint(0, 10_000_000)},
+        "top_pages": top_pages,
+        "top_countries": top_countries,
+        "top_keywords": top_keywords,
+    }]
@@ -0,0 +1,485 @@
+"""
+Benchmark runner for the response formatters, the upstream requests and the MCP tools
+
+Usage:
+    python -m benchmarks.run                    # run and compare with baseline.json
+    python -m benchmarks.run --update-baseline  # run and record a new baseline
+
+Each case records the median wall time over ``--repeat`` runs, timed with the
+garbage collector disabled, the median ratio of each run to a short calibration
+workload timed right before it, and the peak memory allocated while running it
+once under tracemalloc. The result store
+cases record the size of the object graph of 1M cached rows instead. The run exits with
+status 1 when a case is slower or allocates more than its baseline allows.
+
+Timings are only compared with a baseline recorded on the same Python version
+and architecture, and are compared as those calibration ratios, which follow the
+short bursts of load of a shared machine; memory is always compared.
+``--update-baseline`` replaces the baseline with the cases of that one run.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.payloads import (
+    backlinks_payload,
+    keyword_difficulty_payload,
+    keyword_ideas_payload,
+    traffic_payload,
+)
+from benchmarks.stub_upstream import StubUpstream
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Differences below these floors are treated as noise
+MIN_SECONDS_DELTA = 0.002
+MIN_BYTES_DELTA = 64 * 1024
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Measure the median wall time and the peak allocated bytes of a callable
+    """
+    fn()  # warm up
+    timings, ratios = [], []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            calibration = calibrate()
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        ratios.append(timings[-1] / calibration)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "calibrated": statistics.median(ratios), "peak_bytes": peak}
+
+
+async def measure_async(fn: Callable[[], Awaitable[Any]], repeat: int,
+                        setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Asynchronous counterpart of ``measure``, calling ``setup`` untimed before every call
+    """
+    setup = setup or (lambda: None)
+    setup()
+    await fn()
+    timings, ratios = [], []
+    for _ in range(repeat):
+        setup()
+        gc.collect()
+        gc.disable()
+        try:
+            calibration = calibrate()
+            start = time.perf_counter()
+            await fn()
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        ratios.append(timings[-1] / calibration)
+
+    setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "calibrated": statistics.median(ratios), "peak_bytes": peak}
+
+
+def formatted_backlinks(data: List[Any]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """
+    Formatted backlinks of a payload and their nofollow flags, as returned by request_backlinks
+    """
+    from seo_mcp.backlinks import format_backlinks
+
+    backlinks = data[1]["topBacklinks"]["backlinks"]
+    return format_backlinks(data, "example.com"), [backlink.get("nofollow") for backlink in backlinks]
+
+
+def run_formatters(sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    from seo_mcp.backlinks import compact_backlinks, format_backlinks, summarize_backlinks
+    from seo_mcp.keywords import compact_keyword_ideas, format_keyword_difficulty, format_keyword_ideas
+    from seo_mcp.traffic import format_traffic
+
+    cases: List[Tuple[str, Callable[[int], Any], Callable[[Any], Any]]] = [
+        ("format_backlinks", backlinks_payload, lambda data: format_backlinks(data, "example.com")),
+        ("compact_backlinks", lambda rows: formatted_backlinks(backlinks_payload(rows)),
+         lambda formatted: compact_backlinks(*formatted)),
+        ("summarize_backlinks", lambda rows: compact_backlinks(*formatted_backlinks(backlinks_payload(rows))),
+         summarize_backlinks),
+        ("format_keyword_ideas", keyword_ideas_payload, format_keyword_ideas),
+        ("compact_keyword_ideas", lambda rows: format_keyword_ideas(keyword_ideas_payload(rows)), compact_keyword_ideas),
+        ("format_keyword_difficulty", keyword_difficulty_payload, format_keyword_difficulty),
+        ("format_traffic", traffic_payload, format_traffic),
+    ]
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, generate, formatter in cases:
+        for rows in sizes:
+            data = generate(rows)
+            case = f"formatters/{name}/{rows}"
+            results[case] = measure(lambda: formatter(data), repeat)
+            report(case, results[case])
+    return results
+
+
+def deep_size(obj: Any) -> int:
+    """
+    Bytes held by an object and everything it references, each object counted once
+    """
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, type):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            if hasattr(current, "__dict__"):
+                stack.append(current.__dict__)
+            for cls in type(current).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(current, slot):
+                        stack.append(getattr(current, slot))
+    return size
+
+
+def run_store(rows: int, rows_per_result: int) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the memory held by ``rows`` cached rows kept as formatted dicts and
+    as compact tables, the rows being split into results of ``rows_per_result``
+    rows like a cache filled by many domains and keywords
+    """
+    from seo_mcp.backlinks import compact_backlinks, format_backlinks
+    from seo_mcp.keywords import compact_keyword_ideas, format_keyword_ideas
+
+    cases = [
+        ("backlinks", backlinks_payload, lambda data: format_backlinks(data, "example.com"),
+         lambda data: compact_backlinks(*formatted_backlinks(data))),
+        ("keyword_ideas", keyword_ideas_payload, format_keyword_ideas,
+         lambda data: compact_keyword_ideas(format_keyword_ideas(data))),
+    ]
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, generate, as_dicts, as_compact in cases:
+        dicts, compact = [], []
+        for seed in range(rows // rows_per_result):
+            data = generate(rows_per_result, seed)
+            dicts.append(as_dicts(data))
+            compact.append(as_compact(data))
+            del data
+
+        for kind, cached in (("dicts", dicts), ("compact", compact)):
+            case = f"store/{name}/{kind}/{rows}"
+            results[case] = {"retained_bytes": deep_size(cached)}
+            report(case, results[case])
+        del dicts, compact
+
+        reduction = 1 - results[f"store/{name}/compact/{rows}"]["retained_bytes"] / results[f"store/{name}/dicts/{rows}"]["retained_bytes"]
+        print(f"{f'store/{name}/reduction':<50} {reduction * 100:>10.1f} %")
+    return results
+
+
+def run_index(sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Search latency of the local keyword index filled with keyword ideas and SERP results,
+    and the cost of the background writes that keep it up to date
+    """
+    from seo_mcp.index import KeywordIndex
+    from seo_mcp.keywords import compact_keyword_ideas, format_keyword_difficulty, format_keyword_ideas
+
+    searches: List[Tuple[str, Callable[[KeywordIndex], Any]]] = [
+        ("ideas_prefix", lambda index: index.search_keyword_ideas("seo too", "prefix")),
+        ("ideas_phrase", lambda index: index.search_keyword_ideas("backlink checker", "phrase", country="us")),
+        ("serp_filtered", lambda index: index.search_serp("guide", "prefix", min_domain_rating=50, max_position=100)),
+    ]
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in sizes:
+            index = KeywordIndex(os.path.join(workdir, f"index_{rows}.db"))
+            ideas = compact_keyword_ideas(format_keyword_ideas(keyword_ideas_payload(rows)))
+            serp = format_keyword_difficulty(keyword_difficulty_payload(rows))
+            index.add_keyword_ideas("seo", ideas.records())
+            index.add_serp("seo", "us", serp)
+            for name, search in searches:
+                case = f"index/{name}/{rows}"
+                results[case] = measure(lambda: search(index), repeat)
+                report(case, results[case])
+
+            # The same rows fetched again, as written on the background thread after each cold call
+            writes: List[Tuple[str, Callable[[], Any]]] = [
+                ("upsert_keyword_ideas", lambda: index.add_keyword_ideas("seo", ideas.records())),
+                ("upsert_serp", lambda: index.add_serp("seo", "us", serp)),
+            ]
+            for name, write in writes:
+                case = f"index/{name}/{rows}"
+                results[case] = measure(write, repeat)
+                report(case, results[case])
+            index.close()
+    return results
+
+
+def run_requests(stub: StubUpstream, sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Request and decode each upstream response from the stub, including the formatting
+    of the backlinks and keyword ideas done row by row while they are received
+    """
+    from seo_mcp.backlinks import request_backlinks
+    from seo_mcp.keywords import request_keyword_ideas
+    from seo_mcp.traffic import check_traffic
+
+    cases: List[Tuple[str, Callable[[], Any]]] = [
+        ("request_backlinks", lambda: request_backlinks("signature", "2099-01-01T00:00:00Z", "example.com")),
+        ("request_keyword_ideas", lambda: request_keyword_ideas("token", "seo tools")),
+        ("check_traffic", lambda: check_traffic("token", "example.com")),
+    ]
+
+    results: Dict[str, Dict[str, float]] = {}
+    for rows in sizes:
+        stub.set_rows(rows)
+        for name, request in cases:
+            case = f"requests/{name}/{rows}"
+            results[case] = measure(request, repeat)
+            report(case, results[case])
+    return results
+
+
+async def _run_tools(stub: StubUpstream, sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    from fastmcp import Client
+    from seo_mcp.background import background
+    from seo_mcp.index import keyword_index
+    from seo_mcp.server import mcp
+    from seo_mcp.store import store
+
+    calls = [
+        ("get_backlinks_list", {"domain": "example.com"}),
+        ("backlink_profile", {"domain": "example.com"}),
+        ("keyword_generator", {"keyword": "seo tools"}),
+        ("keyword_difficulty", {"keyword": "seo tools"}),
+        ("get_traffic", {"domain_or_url": "example.com"}),
+    ]
+
+    results: Dict[str, Dict[str, float]] = {}
+    async with Client(mcp) as client:
+        for rows in sizes:
+            stub.set_rows(rows)
+            for tool, arguments in calls:
+                def settle() -> None:
+                    # Cache fills and index writes of the previous call are not part of the response time
+                    background.flush()
+                    keyword_index.flush()
+
+                def cold() -> None:
+                    settle()
+                    store.clear()
+
+                name = f"tools/{tool}/{rows}"
+                results[name] = await measure_async(lambda: client.call_tool(tool, arguments), repeat, cold)
+                report(name, results[name])
+
+                if tool in ("get_backlinks_list", "backlink_profile", "keyword_generator"):
+                    name = f"tools/{tool}/{rows}/cached"
+                    results[name] = await measure_async(lambda: client.call_tool(tool, arguments), repeat, settle)
+                    report(name, results[name])
+    return results
+
+
+def run_tools(stub: StubUpstream, sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Call every MCP tool end-to-end through an in-memory client against the stub upstream
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the signature cache file out of the working tree
+        os.chdir(workdir)
+        try:
+            return asyncio.run(_run_tools(stub, sizes, repeat))
+        finally:
+            os.chdir(cwd)
+
+
+def report(name: str, result: Dict[str, float]) -> None:
+    columns = []
+    if "seconds" in result:
+        columns.append(f"{result['seconds'] * 1000:>10.2f} ms")
+    if "calibrated" in result:
+        columns.append(f"{result['calibrated']:>8.2f}x cal")
+    if "peak_bytes" in result:
+        columns.append(f"{result['peak_bytes'] / 1024:>12.1f} KiB peak")
+    if "retained_bytes" in result:
+        columns.append(f"{result['retained_bytes'] / 1024:>12.1f} KiB retained")
+    print(f"{name:<50} {' '.join(columns)}")
+
+
+# Fixed pure-Python workload timed next to every timed call
+CALIBRATION_ROWS = [{"keyword": f"keyword {i}", "volume": i % 97, "labels": ["a", "b", str(i)]} for i in range(2_000)]
+
+
+def calibrate() -> float:
+    """
+    Wall time of a fixed pure-Python workload
+
+    Timed right before every timed call: load from other processes slows both
+    down alike, so the ratio of the two is compared rather than the wall time.
+    """
+    start = time.perf_counter()
+    decoded = json.loads(json.dumps(CALIBRATION_ROWS))
+    sorted((row["volume"], row["keyword"]) for row in decoded)
+    return time.perf_counter() - start
+
+
+def comparable(document: Dict[str, Any]) -> bool:
+    """
+    Whether the timings of a baseline were recorded with this Python version and architecture
+    """
+    return document.get("python") == platform.python_version() and document.get("machine") == platform.machine()
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            time_tolerance: float, memory_tolerance: float, timings: bool = True) -> List[str]:
+    """
+    Compare results with the baseline
+
+    Args:
+        timings: Also compare the calibrated timings, False to only compare memory
+
+    Returns:
+        A list of regression messages, empty if every case is within tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        if timings and "calibrated" in result and "calibrated" in expected:
+            # Baseline time at the speed the machine ran this case at
+            seconds = result["seconds"] * expected["calibrated"] / result["calibrated"]
+            if (result["calibrated"] > expected["calibrated"] * (1 + time_tolerance)
+                    and result["seconds"] - seconds > MIN_SECONDS_DELTA):
+                regressions.append(f"{name}: {result['seconds'] * 1000:.2f} ms, baseline {seconds * 1000:.2f} ms "
+                                   f"at the same machine speed")
+        for metric in ("peak_bytes", "retained_bytes"):
+            if metric not in result or metric not in expected:
+                continue
+            bytes_limit = expected[metric] * (1 + memory_tolerance)
+            if result[metric] > bytes_limit and result[metric] - expected[metric] > MIN_BYTES_DELTA:
+                regressions.append(
+                    f"{name}: {metric} {result[metric] / 1024:.1f} KiB, baseline {expected[metric] / 1024:.1f} KiB")
+    return regressions
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="SEO MCP benchmarks")
+    parser.add_argument("--sizes", type=parse_sizes, default=[100, 10_000, 100_000],
+                        help="Comma separated row counts for the formatter benchmarks")
+    parser.add_argument("--tool-sizes", type=parse_sizes, default=[100, 10_000],
+                        help="Comma separated row counts for the end-to-end tool benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case, the median is kept")
+    parser.add_argument("--store-rows", type=int, default=1_000_000,
+                        help="Rows cached by the result store memory benchmark")
+    parser.add_argument("--store-rows-per-result", type=int, default=1_000,
+                        help="Rows of each cached result in the store memory benchmark")
+    parser.add_argument("--skip-tools", action="store_true", help="Skip the upstream request and end-to-end tool benchmarks")
+    parser.add_argument("--skip-store", action="store_true", help="Skip the result store memory benchmark")
+    parser.add_argument("--skip-index", action="store_true", help="Skip the keyword index search benchmarks")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file to compare with")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Replace the baseline file with the results of this run")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--time-tolerance", type=float, default=0.5,
+                        help="Allowed relative slowdown before a case fails, default 0.5")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1,
+                        help="Allowed relative peak memory growth before a case fails, default 0.1")
+    args = parser.parse_args(argv)
+
+    with StubUpstream() as stub:
+        # The upstream endpoints are read when seo_mcp is first imported
+        os.environ["AHREFS_API_BASE"] = stub.ahrefs_base
+        os.environ["CAPSOLVER_API_BASE"] = stub.capsolver_base
+        os.environ["CAPSOLVER_POLL_INTERVAL"] = "0"
+
+        results = run_formatters(args.sizes, args.repeat)
+        if not args.skip_store:
+            results.update(run_store(args.store_rows, args.store_rows_per_result))
+        if not args.skip_index:
+            results.update(run_index(args.sizes, args.repeat))
+        if not args.skip_tools:
+            results.update(run_requests(stub, args.tool_sizes, args.repeat))
+            results.update(run_tools(stub, args.tool_sizes, args.repeat))
+
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+
+    baseline_document: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline_document = json.load(f)
+    timings = comparable(baseline_document)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not baseline_document:
+        print(f"\nNo baseline at {args.baseline}, run with --update-baseline to create one")
+        return 0
+
+    if not timings:
+        print(f"\nTimings not compared: the baseline was recorded on Python {baseline_document.get('python')} "
+              f"{baseline_document.get('machine')}, this run is Python {platform.python_version()} "
+              f"{platform.machine()}; only memory is checked")
+    regressions = compare(results, baseline_document.get("cases", {}), args.time_tolerance,
+                          args.memory_tolerance, timings)
+    if regressions:
+        print("\nPerformance regressions:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo performance regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+A local HTTP server standing in for the Ahrefs and CapSolver APIs
+
+Point ``AHREFS_API_BASE`` and ``CAPSOLVER_API_BASE`` at ``StubUpstream.ahrefs_base``
+and ``StubUpstream.capsolver_base`` before importing ``seo_mcp``.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from benchmarks.payloads import (
+    backlinks_payload,
+    keyword_difficulty_payload,
+    keyword_ideas_payload,
+    traffic_payload,
+)
+
+
+def _encode(data: Any) -> bytes:
+    return json.dumps(data).encode("utf-8")
+
+
+class StubUpstream:
+    """
+    Serve pre-encoded synthetic payloads of a fixed row count
+    """
+
+    def __init__(self, rows: int = 100):
+        self.bodies: Dict[str, bytes] = {}
+        self.set_rows(rows)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def set_rows(self, rows: int) -> None:
+        """
+        Re-generate the served payloads with the given number of rows
+        """
+        overview = {
+            "signedInput": {
+                "signature": "stub-signature",
+                "input": {"validUntil": "2099-01-01T00:00:00Z"},
+            },
+            "data": {"domainRating": 76, "backlinks": rows, "refDomains": max(1, rows // 20)},
+        }
+        self.bodies = {
+            "/v4/stGetFreeBacklinksOverview": _encode(["Ok", overview]),
+            "/v4/stGetFreeBacklinksList": _encode(backlinks_payload(rows)),
+            "/v4/stGetFreeKeywordIdeas": _encode(keyword_ideas_payload(rows)),
+            "/v4/stGetFreeSerpOverviewForKeywordDifficultyChecker": _encode(keyword_difficulty_payload(rows)),
+            "/v4/stGetFreeTrafficOverview": _encode(traffic_payload(rows)),
+            "/capsolver/createTask": _encode({"errorId": 0, "taskId": "stub-task"}),
+            "/capsolver/getTaskResult": _encode({"errorId": 0, "status": "ready", "solution": {"token": "stub-token"}}),
+        }
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None, "stub upstream is not running"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def ahrefs_base(self) -> str:
+        return f"{self.base_url}/v4"
+
+    @property
+    def capsolver_base(self) -> str:
+        return f"{self.base_url}/capsolver"
+
+    def start(self) -> "StubUpstream":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                body = stub.bodies.get(self.path.split("?", 1)[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubUpstream":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
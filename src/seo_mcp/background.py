@@ -0,0 +1,59 @@
+"""
+Work done after a tool call has returned
+
+Filling the result cache and the keyword index is not needed to answer the call
+that fetched the rows, so it is queued to a single background thread instead of
+delaying the response. Tasks run one at a time in submission order.
+"""
+import queue
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+from seo_mcp.logger import setup_logger
+
+
+logger = setup_logger("background")
+
+
+class BackgroundWriter:
+    """
+    Single daemon thread running queued calls in order
+
+    Args:
+        name: Name of the thread, started on first submit
+    """
+
+    def __init__(self, name: str = "seo-mcp-background"):
+        self.name = name
+        self._tasks: "queue.Queue[Tuple[Callable[..., Any], Tuple[Any, ...]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        """
+        Queue a call and return immediately
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name=self.name, daemon=True)
+                self._thread.start()
+        self._tasks.put((fn, args))
+
+    def flush(self) -> None:
+        """
+        Wait until every queued call, including calls queued by them, has run
+        """
+        self._tasks.join()
+
+    def _work(self) -> None:
+        while True:
+            fn, args = self._tasks.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Background task {getattr(fn, '__name__', fn)} failed: {e}")
+            finally:
+                self._tasks.task_done()
+
+
+background = BackgroundWriter()
@@ -1,13 +1,25 @@
-from typing import Any, List, Optional, Dict, Tuple, cast
+from typing import Any, List, Optional, Dict, Sequence, Tuple, cast
 import os
+import heapq
 import json
 import time
+from collections import Counter
 from datetime import datetime
 import requests
 
+from seo_mcp.config import AHREFS_API_BASE
+from seo_mcp.store import BacklinkTable, DictColumn
+from seo_mcp.stream import STREAM_CHUNK_SIZE, load
+
 # Cache file path for storing signatures
 SIGNATURE_CACHE_FILE = "signature_cache.json"
 
+# Fields of a backlink returned by format_backlinks, in the column order of BacklinkTable
+BACKLINK_FIELDS = ("anchor", "domainRating", "title", "urlFrom", "urlTo", "edu", "gov")
+
+# Most referring domains and anchors listed by summarize_backlinks, keeping the profile small
+MAX_PROFILE_TOP = 100
+
 
 def iso_to_timestamp(iso_date_string: str) -> float:
     """
@@ -112,7 +124,7 @@ def get_signature_and_overview(token: str, domain: str) -> Tuple[
     Returns:
         (signature, valid_until, overview_data) tuple, or (None, None, None) if failed
     """
-    url = "https://ahrefs.com/v4/stGetFreeBacklinksOverview"
+    url = f"{AHREFS_API_BASE}/stGetFreeBacklinksOverview"
     payload = {
         "captcha": token,
         "mode": "subdomains",
@@ -147,35 +159,163 @@ def get_signature_and_overview(token: str, domain: str) -> Tuple[
         return None, None, None
 
 
+def format_backlink(backlink: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Format one backlink, keeping only the necessary fields
+    """
+    return {
+        "anchor": backlink.get("anchor", ""),
+        "domainRating": backlink.get("domainRating", 0),
+        "title": backlink.get("title", ""),
+        "urlFrom": backlink.get("urlFrom", ""),
+        "urlTo": backlink.get("urlTo", ""),
+        "edu": backlink.get("edu", False),
+        "gov": backlink.get("gov", False),
+    }
+
+
+def _top_backlinks(backlinks_data: Optional[List[Any]]) -> List[Any]:
+    if backlinks_data and len(backlinks_data) > 1 and "topBacklinks" in backlinks_data[1]:
+        return backlinks_data[1]["topBacklinks"]["backlinks"]
+    return []
+
+
 def format_backlinks(backlinks_data: List[Any], domain: str) -> List[Any]:
     """
     Format backlinks data
     """
-    if backlinks_data and len(backlinks_data) > 1 and "topBacklinks" in backlinks_data[1]:
-        backlinks = backlinks_data[1]["topBacklinks"]["backlinks"]
-        # Only keep necessary fields
-        simplified_backlinks = []
-        for backlink in backlinks:
-            simplified_backlink = {
-                "anchor": backlink.get("anchor", ""),
-                "domainRating": backlink.get("domainRating", 0),
-                "title": backlink.get("title", ""),
-                "urlFrom": backlink.get("urlFrom", ""),
-                "urlTo": backlink.get("urlTo", ""),
-                "edu": backlink.get("edu", False),
-                "gov": backlink.get("gov", False),
-            }
-            simplified_backlinks.append(simplified_backlink)
-        return simplified_backlinks
-    else:
-        return []
+    return [format_backlink(backlink) for backlink in _top_backlinks(backlinks_data)]
 
 
-def get_backlinks(signature: str, valid_until: str, domain: str) -> Optional[List[Any]]:
+def compact_backlinks(backlinks: List[Dict[str, Any]], nofollow: Sequence[Any]) -> BacklinkTable:
+    """
+    Pack formatted backlinks and their nofollow flags into a compact table
+
+    Args:
+        backlinks: Backlinks as returned by format_backlinks
+        nofollow: The nofollow flag of each backlink, in the same order
+
+    Returns:
+        The frozen table
+    """
+    table = BacklinkTable()
+    if backlinks:
+        # Every formatted backlink has all the fields, no defaults to apply
+        table.extend_columns([[backlink[field] for backlink in backlinks] for field in BACKLINK_FIELDS] + [nofollow])
+    return table.freeze()
+
+
+def _value_counts(column: DictColumn) -> Dict[Any, int]:
+    # Count the codes in one pass over the code array, then decode each distinct value once
+    counts: Dict[Any, int] = {}
+    for code, count in Counter(column.codes).items():
+        value = column.values[code]
+        counts[value] = counts.get(value, 0) + count
+    return counts
+
+
+def _share(count: int, total: int) -> float:
+    return round(count / total, 4) if total else 0.0
+
+
+def _top(counts: Dict[Any, int], top: int, total: int, key: str) -> List[Dict[str, Any]]:
+    return [
+        {key: value, "backlinks": count, "share": _share(count, total)}
+        for value, count in heapq.nlargest(top, counts.items(), key=lambda item: item[1])
+    ]
+
+
+def _referring_domain(url: str) -> str:
+    if "://" in url:
+        url = url.split("://", 1)[1]
+    return url.split("/", 1)[0].lower()
+
+
+def summarize_backlinks(table: BacklinkTable, top: int = 10) -> Dict[str, Any]:
+    """
+    Aggregate a backlinks table into a fixed-size profile
+
+    Dictionary encoded columns are counted over their code arrays, so the cost
+    of the ratings, flags and anchors grows with the number of distinct values
+    rather than with the number of backlinks.
+
+    Args:
+        table: Backlinks, as built by compact_backlinks
+        top: Number of referring domains and anchors listed, at most MAX_PROFILE_TOP
+
+    Returns:
+        Domain rating statistics and distribution, edu/gov and dofollow shares,
+        top referring domains and top anchors
+    """
+    if top < 1:
+        raise ValueError(f"top must be at least 1, got {top}")
+    top = min(top, MAX_PROFILE_TOP)
+    total = len(table)
+
+    ratings = sorted(
+        (value, count) for value, count in _value_counts(table.column("domainRating")).items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    )
+    rated = sum(count for _, count in ratings)
+    distribution = {f"{low}-{low + 9 if low < 90 else 100}": 0 for low in range(0, 100, 10)}
+    median = None
+    seen = 0
+    for value, count in ratings:
+        low = min(max(int(value), 0) // 10, 9) * 10
+        distribution[f"{low}-{low + 9 if low < 90 else 100}"] += count
+        if median is None and (seen + count) * 2 >= rated:
+            median = value
+        seen += count
+
+    flags = {}
+    for name in ("edu", "gov"):
+        count = _value_counts(table.column(name)).get(True, 0)
+        flags[name] = {"backlinks": count, "share": _share(count, total)}
+
+    nofollow = _value_counts(table.column("nofollow"))
+    dofollow_count, nofollow_count = nofollow.get(False, 0), nofollow.get(True, 0)
+
+    # Backlinks without a source url or anchor text are left out of the rankings
+    domains = Counter(_referring_domain(url) for url in table.column("urlFrom") if isinstance(url, str) and url)
+    anchors = {
+        anchor: count for anchor, count in _value_counts(table.column("anchor")).items()
+        if anchor is not None and anchor != ""
+    }
+
+    return {
+        "backlinks": total,
+        "domainRating": {
+            "min": ratings[0][0] if ratings else None,
+            "max": ratings[-1][0] if ratings else None,
+            "mean": round(sum(value * count for value, count in ratings) / rated, 2) if rated else None,
+            "median": median,
+            "distribution": distribution,
+        },
+        "edu": flags["edu"],
+        "gov": flags["gov"],
+        "dofollow": {
+            "dofollow": dofollow_count,
+            "nofollow": nofollow_count,
+            "unknown": total - dofollow_count - nofollow_count,
+            "share": _share(dofollow_count, dofollow_count + nofollow_count),
+        },
+        "referringDomains": {"total": len(domains), "top": _top(domains, top, total, "domain")},
+        "anchors": {"total": len(anchors), "top": _top(anchors, top, total, "anchor")},
+    }
+
+
+def request_backlinks(signature: str, valid_until: str, domain: str) -> Optional[Tuple[List[Dict[str, Any]], List[Any]]]:
+    """
+    Request the top backlinks of a domain, formatting each one as it is received
+
+    Returns:
+        The backlinks as returned by format_backlinks and the nofollow flag of each,
+        or None if the request fails
+    """
     if not signature or not valid_until:
         return None
 
-    url = "https://ahrefs.com/v4/stGetFreeBacklinksList"
+    url = f"{AHREFS_API_BASE}/stGetFreeBacklinksList"
     payload = {
         "reportType": "TopBacklinks",
         "signedInput": {
@@ -192,13 +332,31 @@ def get_backlinks(signature: str, valid_until: str, domain: str) -> Optional[Lis
         "Content-Type": "application/json"
     }
 
-    response = requests.post(url, json=payload, headers=headers)
-    if response.status_code != 200:
-        return None
+    with requests.post(url, json=payload, headers=headers, stream=True) as response:
+        if response.status_code != 200:
+            return None
 
-    data = response.json()
+        # Format the backlinks one by one while they are received; the nofollow flag is
+        # not returned with them but kept aside for summarize_backlinks
+        nofollow: List[Any] = []
+
+        def row(backlink: Dict[str, Any]) -> Dict[str, Any]:
+            nofollow.append(backlink.get("nofollow"))
+            return format_backlink(backlink)
+
+        data = load(response.iter_content(STREAM_CHUNK_SIZE), {
+            (1, "topBacklinks", "backlinks"): row,
+        })
+        return _top_backlinks(data), nofollow
+
+
+def get_backlinks(signature: str, valid_until: str, domain: str) -> Optional[List[Any]]:
+    result = request_backlinks(signature, valid_until, domain)
+    if result is None:
+        return None
 
-    return format_backlinks(data, domain)
+    backlinks, _ = result
+    return backlinks
 
 
 def get_backlinks_overview(signature: str, valid_until: str, domain: str) -> Optional[Dict[str, Any]]:
@@ -217,7 +375,7 @@ def get_backlinks_overview(signature: str, valid_until: str, domain: str) -> Opt
         print("ERROR: No signature or valid_until, cannot proceed")
         return None
 
-    url = "https://ahrefs.com/v4/stGetFreeBacklinksOverview"
+    url = f"{AHREFS_API_BASE}/stGetFreeBacklinksOverview"
     payload = {
         "captcha": signature,
         "mode": "subdomains",
@@ -0,0 +1,42 @@
+"""
+Runtime configuration read from environment variables
+"""
+import os
+
+
+# Base URL of the Ahrefs free-tools API, override to point at a local stub
+AHREFS_API_BASE = os.environ.get("AHREFS_API_BASE", "https://ahrefs.com/v4").rstrip("/")
+
+# Base URL of the CapSolver API
+CAPSOLVER_API_BASE = os.environ.get("CAPSOLVER_API_BASE", "https://api.capsolver.com").rstrip("/")
+
+# Seconds to wait between two CapSolver task result polls
+CAPSOLVER_POLL_INTERVAL = float(os.environ.get("CAPSOLVER_POLL_INTERVAL", "1"))
+
+# Number of upstream calls running at the same time across all clients
+SCHEDULER_WORKERS = int(os.environ.get("SEO_MCP_WORKERS", "4"))
+
+# Number of upstream calls of each priority class a single client may have running at the same time
+SCHEDULER_CLIENT_CONCURRENCY = int(os.environ.get("SEO_MCP_CLIENT_CONCURRENCY", "2"))
+
+# Queued and running calls above which a client is scheduled as bulk
+SCHEDULER_BULK_THRESHOLD = int(os.environ.get("SEO_MCP_BULK_THRESHOLD", "4"))
+
+# Fair-share weights of the interactive and bulk priority classes
+SCHEDULER_INTERACTIVE_WEIGHT = float(os.environ.get("SEO_MCP_INTERACTIVE_WEIGHT", "8"))
+SCHEDULER_BULK_WEIGHT = float(os.environ.get("SEO_MCP_BULK_WEIGHT", "1"))
+
+# Seconds backlink and keyword results stay in the in-process store, 0 disables it
+CACHE_TTL = float(os.environ.get("SEO_MCP_CACHE_TTL", "3600"))
+
+# Rows kept in the in-process store before the least recently used results are evicted
+CACHE_MAX_ROWS = int(os.environ.get("SEO_MCP_CACHE_MAX_ROWS", "1000000"))
+
+# SQLite database of every keyword idea and SERP result fetched so far, empty disables it
+INDEX_PATH = os.environ.get("SEO_MCP_INDEX_PATH", "keyword_index.db")
+
+# SQLite database of submitted jobs, kept across restarts so queued jobs resume
+JOBS_PATH = os.environ.get("SEO_MCP_JOBS_PATH", "jobs.db")
+
+# Seconds a finished job and its result are kept for job_result
+JOB_TTL = float(os.environ.get("SEO_MCP_JOB_TTL", "3600"))
@@ -0,0 +1,319 @@
+"""
+Local full-text index of previously fetched keyword ideas and SERP results
+
+Every keyword idea returned by ``keyword_generator`` and every organic SERP
+result returned by ``keyword_difficulty`` is upserted into a SQLite database
+with FTS5 tables, so known keywords can be searched by prefix, phrase and
+metrics without calling the upstream again. The rows are written on the
+background thread of ``seo_mcp.background``, so indexing does not delay the
+tool responses; a search run right after a fetch may not see its rows yet.
+"""
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from seo_mcp.background import BackgroundWriter, background
+from seo_mcp.config import INDEX_PATH
+from seo_mcp.logger import setup_logger
+
+
+logger = setup_logger("index")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keyword_ideas (
+    id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    country TEXT NOT NULL,
+    label TEXT,
+    difficulty TEXT,
+    volume TEXT,
+    updated_at TEXT,
+    seed TEXT,
+    fetched_at REAL,
+    UNIQUE (keyword, country)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS keyword_ideas_fts USING fts5(
+    keyword, content='keyword_ideas', content_rowid='id', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS keyword_ideas_ai AFTER INSERT ON keyword_ideas BEGIN
+    INSERT INTO keyword_ideas_fts (rowid, keyword) VALUES (new.id, new.keyword);
+END;
+CREATE TRIGGER IF NOT EXISTS keyword_ideas_ad AFTER DELETE ON keyword_ideas BEGIN
+    INSERT INTO keyword_ideas_fts (keyword_ideas_fts, rowid, keyword) VALUES ('delete', old.id, old.keyword);
+END;
+CREATE TRIGGER IF NOT EXISTS keyword_ideas_au AFTER UPDATE OF keyword ON keyword_ideas BEGIN
+    INSERT INTO keyword_ideas_fts (keyword_ideas_fts, rowid, keyword) VALUES ('delete', old.id, old.keyword);
+    INSERT INTO keyword_ideas_fts (rowid, keyword) VALUES (new.id, new.keyword);
+END;
+
+CREATE TABLE IF NOT EXISTS serp_results (
+    id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    country TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    position INTEGER,
+    domain_rating NUMERIC,
+    url_rating NUMERIC,
+    traffic INTEGER,
+    keywords INTEGER,
+    top_keyword TEXT,
+    top_volume INTEGER,
+    difficulty INTEGER,
+    fetched_at REAL,
+    UNIQUE (keyword, country, url)
+);
+CREATE INDEX IF NOT EXISTS serp_results_domain_rating ON serp_results (domain_rating);
+CREATE VIRTUAL TABLE IF NOT EXISTS serp_results_fts USING fts5(
+    keyword, title, url, top_keyword, content='serp_results', content_rowid='id', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS serp_results_ai AFTER INSERT ON serp_results BEGIN
+    INSERT INTO serp_results_fts (rowid, keyword, title, url, top_keyword)
+    VALUES (new.id, new.keyword, new.title, new.url, new.top_keyword);
+END;
+CREATE TRIGGER IF NOT EXISTS serp_results_ad AFTER DELETE ON serp_results BEGIN
+    INSERT INTO serp_results_fts (serp_results_fts, rowid, keyword, title, url, top_keyword)
+    VALUES ('delete', old.id, old.keyword, old.title, old.url, old.top_keyword);
+END;
+DROP TRIGGER IF EXISTS serp_results_au;
+CREATE TRIGGER serp_results_au AFTER UPDATE OF keyword, title, url, top_keyword ON serp_results
+WHEN old.keyword IS NOT new.keyword OR old.title IS NOT new.title
+    OR old.url IS NOT new.url OR old.top_keyword IS NOT new.top_keyword
+BEGIN
+    INSERT INTO serp_results_fts (serp_results_fts, rowid, keyword, title, url, top_keyword)
+    VALUES ('delete', old.id, old.keyword, old.title, old.url, old.top_keyword);
+    INSERT INTO serp_results_fts (rowid, keyword, title, url, top_keyword)
+    VALUES (new.id, new.keyword, new.title, new.url, new.top_keyword);
+END;
+"""
+
+IDEA_COLUMNS = ("keyword", "country", "label", "difficulty", "volume", "updated_at", "seed", "fetched_at")
+IDEA_FIELDS = ("keyword", "country", "label", "difficulty", "volume", "updatedAt", "seed", "fetchedAt")
+
+SERP_COLUMNS = ("keyword", "country", "position", "title", "url", "domain_rating", "url_rating", "traffic",
+                "keywords", "top_keyword", "top_volume", "difficulty", "fetched_at")
+SERP_FIELDS = ("keyword", "country", "position", "title", "url", "domainRating", "urlRating", "traffic",
+               "keywords", "topKeyword", "topVolume", "difficulty", "fetchedAt")
+
+
+def fts_query(query: str, mode: str = "prefix") -> str:
+    """
+    Build an FTS5 MATCH expression from user input
+
+    Args:
+        query: Words to look for
+        mode: "prefix" matches rows containing words starting with every given word,
+              "phrase" matches the words next to each other in order,
+              "fts" passes the query through as raw FTS5 syntax
+
+    Returns:
+        The MATCH expression
+    """
+    if mode == "fts":
+        return query
+
+    if mode == "phrase":
+        return '"' + " ".join(query.split()).replace('"', '""') + '"'
+    if mode == "prefix":
+        return " ".join('"' + word.replace('"', '""') + '"*' for word in query.split())
+    raise ValueError(f"Unknown search mode: {mode}")
+
+
+class KeywordIndex:
+    """
+    SQLite FTS5 index of fetched keyword ideas and SERP results
+
+    Args:
+        path: Database file, opened on first use; an empty path disables the index
+        writer: Background thread the submitted rows are written on
+    """
+
+    def __init__(self, path: str = INDEX_PATH, writer: BackgroundWriter = background):
+        self.path = path
+        self.writer = writer
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def submit_keyword_ideas(self, seed: str, records: Iterable[Tuple[Any, ...]]) -> None:
+        """
+        Queue keyword ideas for add_keyword_ideas on the writer thread and return immediately
+        """
+        if self.enabled:
+            self.writer.submit(self.add_keyword_ideas, seed, records)
+
+    def submit_serp(self, keyword: str, country: str, result: Dict[str, Any]) -> None:
+        """
+        Queue a keyword difficulty result for add_serp on the writer thread and return immediately
+        """
+        if self.enabled:
+            self.writer.submit(self.add_serp, keyword, country, result)
+
+    def flush(self) -> None:
+        """
+        Wait until every queued write is committed
+        """
+        self.writer.flush()
+
+    def add_keyword_ideas(self, seed: str, records: Iterable[Tuple[Any, ...]]) -> int:
+        """
+        Upsert keyword ideas
+
+        Args:
+            seed: Keyword the ideas were generated for
+            records: (label, keyword, country, difficulty, volume, updatedAt) tuples,
+                     as yielded by KeywordIdeaTable.records()
+
+        Returns:
+            Number of rows written
+        """
+        if not self.enabled:
+            return 0
+        now = time.time()
+        rows = [
+            (keyword, country, label, difficulty, volume, updated_at, seed, now)
+            for label, keyword, country, difficulty, volume, updated_at in records
+        ]
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO keyword_ideas ({', '.join(IDEA_COLUMNS)}) VALUES ({', '.join('?' * len(IDEA_COLUMNS))}) "
+                        "ON CONFLICT (keyword, country) DO UPDATE SET label = excluded.label, "
+                        "difficulty = excluded.difficulty, volume = excluded.volume, updated_at = excluded.updated_at, "
+                        "seed = excluded.seed, fetched_at = excluded.fetched_at",
+                        rows,
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to index keyword ideas: {e}")
+            return 0
+        return len(rows)
+
+    def add_serp(self, keyword: str, country: str, result: Dict[str, Any]) -> int:
+        """
+        Upsert the SERP results of a keyword difficulty result
+
+        Args:
+            keyword: Keyword the SERP belongs to
+            country: Country of the SERP
+            result: Result of format_keyword_difficulty
+
+        Returns:
+            Number of rows written
+        """
+        if not self.enabled:
+            return 0
+        now = time.time()
+        difficulty = result.get("difficulty")
+        rows = [
+            (
+                keyword, country, item.get("position"), item.get("title"), item.get("url") or "",
+                item.get("domainRating"), item.get("urlRating"), item.get("traffic"), item.get("keywords"),
+                item.get("topKeyword"), item.get("topVolume"), difficulty, now,
+            )
+            for item in result.get("serp", {}).get("results", [])
+        ]
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO serp_results ({', '.join(SERP_COLUMNS)}) VALUES ({', '.join('?' * len(SERP_COLUMNS))}) "
+                        "ON CONFLICT (keyword, country, url) DO UPDATE SET position = excluded.position, "
+                        "title = excluded.title, domain_rating = excluded.domain_rating, url_rating = excluded.url_rating, "
+                        "traffic = excluded.traffic, keywords = excluded.keywords, top_keyword = excluded.top_keyword, "
+                        "top_volume = excluded.top_volume, difficulty = excluded.difficulty, fetched_at = excluded.fetched_at",
+                        rows,
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to index serp results: {e}")
+            return 0
+        return len(rows)
+
+    def search_keyword_ideas(self, query: str = "", mode: str = "prefix", country: Optional[str] = None,
+                             difficulty: Optional[str] = None, volume: Optional[str] = None,
+                             limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Search indexed keyword ideas, best matches first
+        """
+        conditions, params = [], []
+        if country:
+            conditions.append("i.country = ?")
+            params.append(country)
+        if difficulty:
+            conditions.append("i.difficulty = ?")
+            params.append(difficulty)
+        if volume:
+            conditions.append("i.volume = ?")
+            params.append(volume)
+
+        columns = ", ".join(f"i.{column}" for column in IDEA_COLUMNS)
+        return self._search("keyword_ideas", columns, IDEA_FIELDS, query, mode, conditions, params, limit)
+
+    def search_serp(self, query: str = "", mode: str = "prefix", country: Optional[str] = None,
+                    min_domain_rating: Optional[float] = None, max_domain_rating: Optional[float] = None,
+                    min_traffic: Optional[int] = None, max_position: Optional[int] = None,
+                    max_difficulty: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Search indexed SERP results, best matches first
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ("i.country = ?", country),
+            ("i.domain_rating >= ?", min_domain_rating),
+            ("i.domain_rating <= ?", max_domain_rating),
+            ("i.traffic >= ?", min_traffic),
+            ("i.position <= ?", max_position),
+            ("i.difficulty <= ?", max_difficulty),
+        ):
+            if value is not None and value != "":
+                conditions.append(condition)
+                params.append(value)
+
+        columns = ", ".join(f"i.{column}" for column in SERP_COLUMNS)
+        return self._search("serp_results", columns, SERP_FIELDS, query, mode, conditions, params, limit)
+
+    def _search(self, table: str, columns: str, fields: Tuple[str, ...], query: str, mode: str,
+                conditions: List[str], params: List[Any], limit: int) -> List[Dict[str, Any]]:
+        if not self.enabled:
+            return []
+
+        if query.strip():
+            sql = f"SELECT {columns} FROM {table}_fts f JOIN {table} i ON i.id = f.rowid WHERE {table}_fts MATCH ?"
+            params = [fts_query(query, mode)] + params
+            order = "ORDER BY f.rank"
+        else:
+            sql = f"SELECT {columns} FROM {table} i WHERE 1"
+            order = "ORDER BY i.fetched_at DESC"
+        for condition in conditions:
+            sql += f" AND {condition}"
+        sql += f" {order} LIMIT ?"
+        params.append(max(1, limit))
+
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [dict(zip(fields, row)) for row in rows]
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+keyword_index = KeywordIndex()
@@ -0,0 +1,263 @@
+"""
+Asynchronous jobs for long-running tool calls
+
+A job is a tool call submitted with ``submit_job`` that returns a job id right
+away. The call runs on the scheduler worker pool in the bulk priority class,
+and its state and result are written to a SQLite database. Jobs still queued or
+running when the server stops are queued again on the next start, and finished
+results are kept for a TTL so a client that timed out or reconnected picks up
+the result instead of starting the call again.
+"""
+import inspect
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastmcp import Context
+from fastmcp.utilities.types import find_kwarg_by_type
+from pydantic import BaseModel, ConfigDict, ValidationError, create_model
+
+from seo_mcp.config import JOB_TTL, JOBS_PATH
+from seo_mcp.logger import setup_logger
+from seo_mcp.scheduler import ANONYMOUS_CLIENT, PRIORITY_BULK, FairScheduler, scheduler
+
+
+logger = setup_logger("jobs")
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    args TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_call ON jobs (tool, args);
+CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+"""
+
+STATUS_COLUMNS = ("id", "tool", "args", "status", "error", "created_at", "started_at", "finished_at", "expires_at")
+STATUS_FIELDS = ("id", "tool", "args", "status", "error", "createdAt", "startedAt", "finishedAt", "expiresAt")
+
+
+def parameter_model(name: str, fn: Callable[..., Any]) -> Type[BaseModel]:
+    """
+    Build a model validating keyword arguments against the parameters of a function
+
+    Types, Literal values and required parameters are checked as for an MCP tool
+    call; a Context parameter is left out and unknown arguments are rejected.
+    """
+    context = find_kwarg_by_type(fn, kwarg_type=Context)
+    fields: Dict[str, Any] = {}
+    for param in inspect.signature(fn).parameters.values():
+        if param.name == context:
+            continue
+        annotation = Any if param.annotation is inspect.Parameter.empty else param.annotation
+        default = ... if param.default is inspect.Parameter.empty else param.default
+        fields[param.name] = (annotation, default)
+    return create_model(f"{name}_arguments", __config__=ConfigDict(extra="forbid"), **fields)
+
+
+class JobQueue:
+    """
+    Persisted queue of tool calls run in the background
+
+    Args:
+        path: Database file, opened on first use
+        ttl: Seconds a finished job is kept
+        scheduler: Scheduler the calls are dispatched to
+    """
+
+    def __init__(self, path: str = JOBS_PATH, ttl: float = JOB_TTL, scheduler: FairScheduler = scheduler):
+        self.path = path
+        self.ttl = ttl
+        self.scheduler = scheduler
+        self.tools: Dict[str, Callable[..., Any]] = {}
+        self._models: Dict[str, Type[BaseModel]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def register(self, name: str, fn: Callable[..., Any], tool: Optional[Callable[..., Any]] = None) -> None:
+        """
+        Allow a blocking function to be submitted as a job under the given tool name
+
+        Args:
+            name: Tool name given to submit
+            fn: Blocking function run with the validated arguments
+            tool: Function of the MCP tool whose parameters the arguments are validated against, fn if None
+        """
+        self.tools[name] = fn
+        self._models[name] = parameter_model(name, tool or fn)
+
+    def start(self) -> None:
+        """
+        Open the database and queue again the jobs left pending or running by a previous process
+
+        Call once the tools are registered; otherwise the jobs are only resumed on first use.
+        """
+        with self._lock:
+            self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._resume()
+        return self._conn
+
+    def _resume(self) -> None:
+        # Jobs left pending or running by a previous process are queued again
+        conn = self._conn
+        rows = conn.execute(
+            "SELECT id, tool, client_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (JOB_PENDING, JOB_RUNNING),
+        ).fetchall()
+        with conn:
+            conn.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (JOB_PENDING, JOB_RUNNING))
+        for job_id, tool, client_id in rows:
+            if tool in self.tools:
+                logger.info(f"Resuming job {job_id} ({tool})")
+                self._dispatch(job_id, client_id)
+            else:
+                self._finish(job_id, JOB_FAILED, error=f"Unknown tool: {tool}")
+
+    def submit(self, tool: str, args: Optional[Dict[str, Any]] = None,
+               client_id: str = ANONYMOUS_CLIENT) -> Dict[str, Any]:
+        """
+        Queue a tool call, or return the job already queued or finished for the same call
+
+        Args:
+            tool: Name of a registered tool
+            args: Keyword arguments of the tool
+            client_id: Identity the fair share of the scheduler is computed for
+
+        Returns:
+            The job status
+        """
+        fn = self.tools.get(tool)
+        if fn is None:
+            raise Exception(f"Unknown tool: {tool}, expected one of {', '.join(sorted(self.tools))}")
+        try:
+            arguments = self._models[tool].model_validate(args or {}).model_dump()
+        except ValidationError as e:
+            raise Exception(f"Invalid arguments for {tool}: {e}")
+        # Arguments are coerced and defaults filled in so that equivalent calls share one job
+        args_json = json.dumps(arguments, sort_keys=True, separators=(",", ":"))
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE tool = ? AND args = ? AND status != ? ORDER BY created_at DESC LIMIT 1",
+                    (tool, args_json, JOB_FAILED),
+                ).fetchone()
+                if row is not None:
+                    return self._status(row[0])
+
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, tool, args, client_id, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, tool, args_json, client_id, JOB_PENDING, now),
+                )
+            self._dispatch(job_id, client_id)
+            return self._status(job_id)
+
+    def _dispatch(self, job_id: str, client_id: str) -> None:
+        future = self.scheduler.submit(client_id, self._run, job_id, priority=PRIORITY_BULK)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT tool, args FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            with conn:
+                conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                             (JOB_RUNNING, time.time(), job_id))
+        tool, args_json = row
+
+        try:
+            result = self.tools[tool](**json.loads(args_json))
+        except Exception as e:
+            logger.error(f"Job {job_id} ({tool}) failed: {e}")
+            self._finish(job_id, JOB_FAILED, error=str(e))
+        else:
+            self._finish(job_id, JOB_DONE, result=json.dumps(result))
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, expires_at = ? WHERE id = ?",
+                    (status, result, error, now, now + self.ttl, job_id),
+                )
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Return the state of a job, without its result
+        """
+        with self._lock:
+            self._connect()
+            return self._status(job_id)
+
+    def _status(self, job_id: str) -> Dict[str, Any]:
+        row = self._conn.execute(
+            f"SELECT {', '.join(STATUS_COLUMNS)} FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (job_id, time.time()),
+        ).fetchone()
+        if row is None:
+            raise Exception(f"Unknown or expired job: {job_id}")
+        status = dict(zip(STATUS_FIELDS, row))
+        status["args"] = json.loads(status["args"])
+        return status
+
+    def result(self, job_id: str) -> Dict[str, Any]:
+        """
+        Return the state of a job, with its result once it is done
+        """
+        with self._lock:
+            status = self.status(job_id)
+            if status["status"] == JOB_DONE:
+                row = self._conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                status["result"] = json.loads(row[0])
+        return status
+
+    def future(self, job_id: str) -> Optional[Future]:
+        """
+        Return a future resolved when the job finishes, or None if it is not queued in this process
+        """
+        return self._futures.get(job_id)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+jobs = JobQueue()
@@ -1,61 +1,102 @@
-from typing import List, Optional, Any, Dict
+from functools import partial
+from typing import List, Optional, Any, Dict, Tuple
 
 import requests
 
+from seo_mcp.config import AHREFS_API_BASE
+from seo_mcp.store import KeywordIdeaTable
+from seo_mcp.stream import STREAM_CHUNK_SIZE, load
 
-def format_keyword_ideas(keyword_data: Optional[List[Any]]) -> List[str]:
+
+# Sections of the keyword ideas response and the label of their ideas
+KEYWORD_IDEA_SECTIONS = (("allIdeas", "keyword ideas"), ("questionIdeas", "question ideas"))
+
+# Fields of a formatted keyword idea value, in the column order of KeywordIdeaTable
+KEYWORD_IDEA_FIELDS = ("keyword", "country", "difficulty", "volume", "updatedAt")
+
+
+def format_keyword_idea(idea: Dict[str, Any], label: str) -> Dict[str, Any]:
+    """
+    Format one keyword idea of the section with the given label
+    """
+    return {
+        "label": label,
+        "value": {
+            "keyword": idea.get('keyword', 'No keyword'),
+            "country": idea.get('country', '-'),
+            "difficulty": idea.get('difficultyLabel', 'Unknown'),
+            "volume": idea.get('volumeLabel', 'Unknown'),
+            "updatedAt": idea.get('updatedAt', '-')
+        }
+    }
+
+
+def _keyword_idea_sections(keyword_data: Optional[List[Any]]) -> List[Tuple[List[Any], str]]:
+    # The idea lists of the regular and question sections present in the response, with their labels
     if not keyword_data or len(keyword_data) < 2:
-        return ["\n❌ No valid keyword ideas retrieved"]
-    
+        return []
+
     data = keyword_data[1]
+    return [
+        (data[section]["results"], label) for section, label in KEYWORD_IDEA_SECTIONS
+        if section in data and "results" in data[section]
+    ]
 
-    result = []
-    
-    # 处理常规关键词推荐
-    if "allIdeas" in data and "results" in data["allIdeas"]:
-        all_ideas = data["allIdeas"]["results"]
-        # total = data["allIdeas"].get("total", 0)
-        for idea in all_ideas:
-            simplified_idea = {
-                "keyword": idea.get('keyword', 'No keyword'),
-                "country": idea.get('country', '-'),
-                "difficulty": idea.get('difficultyLabel', 'Unknown'),
-                "volume": idea.get('volumeLabel', 'Unknown'),
-                "updatedAt": idea.get('updatedAt', '-')
-            }
-            result.append({
-                "label": "keyword ideas",
-                "value": simplified_idea
-            })
-    
-    # 处理问题类关键词推荐
-    if "questionIdeas" in data and "results" in data["questionIdeas"]:
-        question_ideas = data["questionIdeas"]["results"]
-        # total = data["questionIdeas"].get("total", 0)
-        for idea in question_ideas:
-            simplified_idea = {
-                "keyword": idea.get('keyword', 'No keyword'),
-                "country": idea.get('country', '-'),
-                "difficulty": idea.get('difficultyLabel', 'Unknown'),
-                "volume": idea.get('volumeLabel', 'Unknown'),
-                "updatedAt": idea.get('updatedAt', '-')
-            }
-            result.append({
-                "label": "question ideas",
-                "value": simplified_idea
-            })
-    
-    if not result:
-        return ["\n❌ No valid keyword ideas retrieved"]
-    
-    return result
+
+def keyword_ideas_or_message(ideas: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Return formatted keyword ideas, or the message of format_keyword_ideas when there are none
+    """
+    return ideas or ["\n❌ No valid keyword ideas retrieved"]
+
+
+def format_keyword_ideas(keyword_data: Optional[List[Any]]) -> List[Any]:
+    result = [
+        format_keyword_idea(idea, label)
+        for ideas, label in _keyword_idea_sections(keyword_data) for idea in ideas
+    ]
+    return keyword_ideas_or_message(result)
+
+
+def compact_keyword_ideas(ideas: List[Dict[str, Any]]) -> KeywordIdeaTable:
+    """
+    Pack formatted keyword ideas into a compact table
+
+    Args:
+        ideas: Keyword ideas as returned by format_keyword_ideas, without the message of an empty result
+
+    Returns:
+        The frozen table
+    """
+    table = KeywordIdeaTable()
+    if ideas:
+        # Every formatted idea has all the fields, no defaults to apply
+        values = [idea["value"] for idea in ideas]
+        table.extend_columns(
+            [[idea["label"] for idea in ideas]] + [[value[field] for value in values] for field in KEYWORD_IDEA_FIELDS]
+        )
+    return table.freeze()
 
 
-def get_keyword_ideas(token: str, keyword: str, country: str = "us", search_engine: str = "Google") -> Optional[List[str]]:
+def keyword_ideas_to_list(table: KeywordIdeaTable) -> List[Any]:
+    """
+    Serialize a compact keyword ideas table to the output of format_keyword_ideas
+    """
+    return keyword_ideas_or_message(table.to_list())
+
+
+def request_keyword_ideas(token: str, keyword: str, country: str = "us", search_engine: str = "Google") -> Optional[List[Dict[str, Any]]]:
+    """
+    Request the keyword ideas for a keyword, formatting each one as it is received
+
+    Returns:
+        The ideas as returned by format_keyword_ideas, empty instead of the message
+        when there are none, or None if the request fails
+    """
     if not token:
         return None
     
-    url = "https://ahrefs.com/v4/stGetFreeKeywordIdeas"
+    url = f"{AHREFS_API_BASE}/stGetFreeKeywordIdeas"
     payload = {
         "withQuestionIdeas": True,
         "captcha": token,
@@ -68,13 +109,75 @@ def get_keyword_ideas(token: str, keyword: str, country: str = "us", search_engi
         "Content-Type": "application/json"
     }
     
-    response = requests.post(url, json=payload, headers=headers)
-    if response.status_code != 200:
+    with requests.post(url, json=payload, headers=headers, stream=True) as response:
+        if response.status_code != 200:
+            return None
+
+        # Format the ideas one by one while they are received
+        data = load(response.iter_content(STREAM_CHUNK_SIZE), {
+            (1, section, "results"): partial(format_keyword_idea, label=label)
+            for section, label in KEYWORD_IDEA_SECTIONS
+        })
+        return [idea for ideas, _ in _keyword_idea_sections(data) for idea in ideas]
+
+
+def get_keyword_ideas(token: str, keyword: str, country: str = "us", search_engine: str = "Google") -> Optional[List[Any]]:
+    ideas = request_keyword_ideas(token, keyword, country, search_engine)
+    if ideas is None:
         return None
-    
-    data = response.json()
 
-    return format_keyword_ideas(data)
+    return keyword_ideas_or_message(ideas)
+
+
+def format_keyword_difficulty(data: List[Any]) -> Dict[str, Any]:
+    """
+    Format keyword difficulty data, keeping only the organic SERP results
+    """
+    # 提取有效数据
+    kd_data = data[1]
+    
+    # 格式化返回结果
+    result = {
+        "difficulty": kd_data.get("difficulty", 0),  # Keyword difficulty
+        "shortage": kd_data.get("shortage", 0),      # Keyword shortage
+        "lastUpdate": kd_data.get("lastUpdate", ""), # Last update time
+        "serp": {
+            "results": []
+        }
+    }
+    
+    # 处理SERP结果
+    if "serp" in kd_data and "results" in kd_data["serp"]:
+        serp_results = []
+        for item in kd_data["serp"]["results"]:
+            # 只处理有机搜索结果
+            if item.get("content") and item["content"][0] == "organic":
+                organic_data = item["content"][1]
+                if "link" in organic_data and organic_data["link"][0] == "Some":
+                    link_data = organic_data["link"][1]
+                    result_item = {
+                        "title": link_data.get("title", ""),
+                        "url": link_data.get("url", [None, {}])[1].get("url", ""),
+                        "position": item.get("pos", 0)
+                    }
+                    
+                    # 添加指标数据（如果有）
+                    if "metrics" in link_data and link_data["metrics"]:
+                        metrics = link_data["metrics"]
+                        result_item.update({
+                            "domainRating": metrics.get("domainRating", 0),
+                            "urlRating": metrics.get("urlRating", 0),
+                            "traffic": metrics.get("traffic", 0),
+                            "keywords": metrics.get("keywords", 0),
+                            "topKeyword": metrics.get("topKeyword", ""),
+                            "topVolume": metrics.get("topVolume", 0)
+                        })
+                    
+                    serp_results.append(result_item)
+        
+        result["serp"]["results"] = serp_results
+    
+    return result
 
 
 def get_keyword_difficulty(token: str, keyword: str, country: str = "us") -> Optional[Dict[str, Any]]:
@@ -92,7 +195,7 @@ def get_keyword_difficulty(token: str, keyword: str, country: str = "us") -> Opt
     if not token:
         return None
     
-    url = "https://ahrefs.com/v4/stGetFreeSerpOverviewForKeywordDifficultyChecker"
+    url = f"{AHREFS_API_BASE}/stGetFreeSerpOverviewForKeywordDifficultyChecker"
     
     payload = {
         "captcha": token,
@@ -116,50 +219,6 @@ def get_keyword_difficulty(token: str, keyword: str, country: str = "us") -> Opt
         if not isinstance(data, list) or len(data) < 2 or data[0] != "Ok":
             return None
         
-        # 提取有效数据
-        kd_data = data[1]
-        
-        # 格式化返回结果
-        result = {
-            "difficulty": kd_data.get("difficulty", 0),  # Keyword difficulty
-            "shortage": kd_data.get("shortage", 0),      # Keyword shortage
-            "lastUpdate": kd_data.get("lastUpdate", ""), # Last update time
-            "serp": {
-                "results": []
-            }
-        }
-        
-        # 处理SERP结果
-        if "serp" in kd_data and "results" in kd_data["serp"]:
-            serp_results = []
-            for item in kd_data["serp"]["results"]:
-                # 只处理有机搜索结果
-                if item.get("content") and item["content"][0] == "organic":
-                    organic_data = item["content"][1]
-                    if "link" in organic_data and organic_data["link"][0] == "Some":
-                        link_data = organic_data["link"][1]
-                        result_item = {
-                            "title": link_data.get("title", ""),
-                            "url": link_data.get("url", [None, {}])[1].get("url", ""),
-                            "position": item.get("pos", 0)
-                        }
-                        
-                        # 添加指标数据（如果有）
-                        if "metrics" in link_data and link_data["metrics"]:
-                            metrics = link_data["metrics"]
-                            result_item.update({
-                                "domainRating": metrics.get("domainRating", 0),
-                                "urlRating": metrics.get("urlRating", 0),
-                                "traffic": metrics.get("traffic", 0),
-                                "keywords": metrics.get("keywords", 0),
-                                "topKeyword": metrics.get("topKeyword", ""),
-                                "topVolume": metrics.get("topVolume", 0)
-                            })
-                        
-                        serp_results.append(result_item)
-            
-            result["serp"]["results"] = serp_results
-        
-        return result
+        return format_keyword_difficulty(data)
     except Exception:
         return None
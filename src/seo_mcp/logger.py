@@ -6,7 +6,7 @@ import os
 from datetime import datetime
 
 
-DEBUG = os.environ.get("DEBUG", "False")
+DEBUG = os.environ.get("DEBUG", "False").lower() in ("1", "true", "yes")
 
 
 def setup_logger(name: str, log_dir: str = "logs", level: int = logging.INFO) -> logging.Logger:
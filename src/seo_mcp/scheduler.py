@@ -0,0 +1,234 @@
+"""
+Fair-share scheduling of blocking upstream calls across MCP clients
+
+Every tool call is queued per client and priority class and dispatched to a
+fixed pool of worker threads with self-clocked weighted fair queuing: each call
+gets a virtual finish tag ``max(V, last tag of its queue) + 1 / weight`` and the
+call with the lowest tag across all queues runs next. A client with a deep
+interactive backlog drops to the bulk priority class and its calls get a small
+weight, so a single interactive call is served before the tenth call of a bulk
+loop, including a bulk loop of the same client.
+"""
+import asyncio
+import hashlib
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from fastmcp import Context
+from fastmcp.server.dependencies import get_http_request
+
+from seo_mcp.config import (
+    SCHEDULER_BULK_THRESHOLD,
+    SCHEDULER_BULK_WEIGHT,
+    SCHEDULER_CLIENT_CONCURRENCY,
+    SCHEDULER_INTERACTIVE_WEIGHT,
+    SCHEDULER_WORKERS,
+)
+from seo_mcp.logger import setup_logger
+
+
+logger = setup_logger("scheduler")
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+ANONYMOUS_CLIENT = "anonymous"
+
+
+class _Task:
+    __slots__ = ("finish_tag", "sequence", "priority", "fn", "args", "kwargs", "future")
+
+    def __init__(self, finish_tag: float, sequence: int, priority: str, fn: Callable[..., Any],
+                 args: Any, kwargs: Dict[str, Any]):
+        self.finish_tag = finish_tag
+        self.sequence = sequence
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+
+
+# Queue key: client identity and priority class
+_FlowKey = Tuple[str, str]
+
+
+class _Flow:
+    __slots__ = ("queue", "running", "last_finish_tag")
+
+    def __init__(self):
+        self.queue: Deque[_Task] = deque()
+        self.running = 0
+        self.last_finish_tag = 0.0
+
+
+class FairScheduler:
+    """
+    Weighted fair queuing scheduler with per-client concurrency quotas
+
+    Args:
+        workers: Number of calls running at the same time across all clients
+        client_concurrency: Number of calls of each priority class a single client may have running
+        bulk_threshold: Queued and running calls above which a client is treated as bulk
+        weights: Weight of each priority class
+    """
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS, client_concurrency: int = SCHEDULER_CLIENT_CONCURRENCY,
+                 bulk_threshold: int = SCHEDULER_BULK_THRESHOLD, weights: Optional[Dict[str, float]] = None):
+        self.workers = max(1, workers)
+        self.client_concurrency = max(1, client_concurrency)
+        self.bulk_threshold = bulk_threshold
+        self.weights = weights or {
+            PRIORITY_INTERACTIVE: SCHEDULER_INTERACTIVE_WEIGHT,
+            PRIORITY_BULK: SCHEDULER_BULK_WEIGHT,
+        }
+
+        self._cond = threading.Condition()
+        self._flows: Dict[_FlowKey, _Flow] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, client_id: str, fn: Callable[..., Any], *args: Any,
+               priority: Optional[str] = None, **kwargs: Any) -> Future:
+        """
+        Queue a blocking call on behalf of a client
+
+        Args:
+            client_id: Identity the fair share is computed for
+            fn: Callable to run on a worker thread
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BULK, derived from the client backlog when None
+
+        Returns:
+            A future resolved with the result of the call
+        """
+        with self._cond:
+            self._start_workers()
+            if priority is None:
+                interactive = self._flows.get((client_id, PRIORITY_INTERACTIVE))
+                backlog = len(interactive.queue) + interactive.running if interactive else 0
+                priority = PRIORITY_BULK if backlog >= self.bulk_threshold else PRIORITY_INTERACTIVE
+            weight = self.weights.get(priority, self.weights[PRIORITY_INTERACTIVE])
+
+            key = (client_id, priority)
+            flow = self._flows.get(key)
+            if flow is None:
+                flow = self._flows[key] = _Flow()
+            finish_tag = max(self._virtual_time, flow.last_finish_tag) + 1.0 / weight
+            flow.last_finish_tag = finish_tag
+            task = _Task(finish_tag, next(self._sequence), priority, fn, args, kwargs)
+            flow.queue.append(task)
+            self._cond.notify()
+        return task.future
+
+    async def run(self, client_id: str, fn: Callable[..., Any], *args: Any,
+                  priority: Optional[str] = None, **kwargs: Any) -> Any:
+        """
+        Queue a blocking call and wait for its result without blocking the event loop
+        """
+        return await asyncio.wrap_future(self.submit(client_id, fn, *args, priority=priority, **kwargs))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return the number of queued and running calls of every active client
+        """
+        with self._cond:
+            stats: Dict[str, Dict[str, int]] = {}
+            for (client_id, _), flow in self._flows.items():
+                client = stats.setdefault(client_id, {"queued": 0, "running": 0})
+                client["queued"] += len(flow.queue)
+                client["running"] += flow.running
+            return stats
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"seo-mcp-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_task(self) -> Optional[Tuple[_FlowKey, _Task]]:
+        best: Optional[_Task] = None
+        best_key = None
+        for key, flow in self._flows.items():
+            if not flow.queue or flow.running >= self.client_concurrency:
+                continue
+            head = flow.queue[0]
+            if best is None or (head.finish_tag, head.sequence) < (best.finish_tag, best.sequence):
+                best, best_key = head, key
+        if best is None:
+            return None
+
+        flow = self._flows[best_key]
+        flow.queue.popleft()
+        flow.running += 1
+        self._virtual_time = max(self._virtual_time, best.finish_tag)
+        return best_key, best
+
+    def _release(self, key: _FlowKey) -> None:
+        with self._cond:
+            flow = self._flows[key]
+            flow.running -= 1
+            if not flow.queue and not flow.running:
+                del self._flows[key]
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                selected = self._next_task()
+                while selected is None:
+                    self._cond.wait()
+                    selected = self._next_task()
+            key, task = selected
+
+            try:
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                logger.debug(f"Running {getattr(task.fn, '__name__', task.fn)} for {key[0]} ({task.priority})")
+                try:
+                    result = task.fn(*task.args, **task.kwargs)
+                except BaseException as e:
+                    task.future.set_exception(e)
+                else:
+                    task.future.set_result(result)
+            finally:
+                self._release(key)
+
+
+def client_identity(ctx: Optional[Context]) -> str:
+    """
+    Work out which client a tool call belongs to
+
+    The server runs stateless, so there is no MCP session id to key on. Uses, in
+    order, the client id sent in the request metadata, an ``X-Client-Id`` header,
+    a hash of the ``Authorization`` header and the remote address. Clients sharing
+    a host or a proxy are only told apart by the first three.
+    """
+    if ctx is None:
+        return ANONYMOUS_CLIENT
+
+    try:
+        if ctx.client_id:
+            return f"client:{ctx.client_id}"
+    except Exception:
+        pass
+
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        return ANONYMOUS_CLIENT
+
+    if request.headers.get("x-client-id"):
+        return f"client:{request.headers['x-client-id']}"
+    if request.headers.get("authorization"):
+        # Never keep the credential itself in the scheduler state or the logs
+        return f"token:{hashlib.sha256(request.headers['authorization'].encode()).hexdigest()[:16]}"
+    if request.client is not None:
+        return f"address:{request.client.host}"
+    return ANONYMOUS_CLIENT
+
+
+scheduler = FairScheduler()
@@ -1,19 +1,35 @@
 """
 SEO MCP Server: A free SEO tool MCP (Model Control Protocol) service based on Ahrefs data. Includes features such as backlinks, keyword ideas, and more.
 """
+import asyncio
 import json
+import sqlite3
 
 import requests
+import signal
+import sys
 import time
 import os
 import urllib.parse
-from typing import Dict, List, Optional, Any, Literal
+from typing import Annotated, Dict, List, Optional, Any, Literal, Tuple
 
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
+from pydantic import Field
 
-from seo_mcp.backlinks import get_backlinks, load_signature_from_cache, get_signature_and_overview
-from seo_mcp.keywords import get_keyword_ideas, get_keyword_difficulty
+from seo_mcp.config import CAPSOLVER_API_BASE, CAPSOLVER_POLL_INTERVAL
+from seo_mcp.backlinks import (
+    compact_backlinks, load_signature_from_cache, get_signature_and_overview, request_backlinks, summarize_backlinks
+)
+from seo_mcp.keywords import (
+    compact_keyword_ideas, get_keyword_difficulty, keyword_ideas_or_message, keyword_ideas_to_list,
+    request_keyword_ideas
+)
 from seo_mcp.traffic import check_traffic
+from seo_mcp.scheduler import scheduler, client_identity
+from seo_mcp.background import background
+from seo_mcp.store import store
+from seo_mcp.index import keyword_index
+from seo_mcp.jobs import jobs
 
 
 mcp = FastMCP("SEO MCP", stateless_http=True)
@@ -47,16 +63,16 @@ def get_capsolver_token(site_url: str) -> Optional[str]:
             }
         }
     }
-    res = requests.post("https://api.capsolver.com/createTask", json=payload)
+    res = requests.post(f"{CAPSOLVER_API_BASE}/createTask", json=payload)
     resp = res.json()
     task_id = resp.get("taskId")
     if not task_id:
         return None
  
     while True:
-        time.sleep(1)  # delay
+        time.sleep(CAPSOLVER_POLL_INTERVAL)  # delay
         payload = {"clientKey": api_key, "taskId": task_id}
-        res = requests.post("https://api.capsolver.com/getTaskResult", json=payload)
+        res = requests.post(f"{CAPSOLVER_API_BASE}/getTaskResult", json=payload)
         resp = res.json()
         status = resp.get("status")
         if status == "ready":
@@ -66,17 +82,10 @@ def get_capsolver_token(site_url: str) -> Optional[str]:
             return None
 
 
-@mcp.tool()
-def get_backlinks_list(domain: str) -> Optional[Dict[str, Any]]:
-    # return {
-    #     "s":"a"
-    # }
+def request_domain_backlinks(domain: str) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[List[Dict[str, Any]], List[Any]]]]:
     """
-    Get backlinks list for the specified domain
-    Args:
-        domain (str): The domain to query
-    Returns:
-        List of backlinks for the domain, containing title, URL, domain rating, etc.
+    Request the backlinks overview and the formatted backlinks list of a domain with
+    their nofollow flags, blocking until done
     """
     # Try to get signature from cache
     signature, valid_until, overview_data = load_signature_from_cache(domain)
@@ -95,30 +104,162 @@ def get_backlinks_list(domain: str) -> Optional[Dict[str, Any]]:
             raise Exception(f"Failed to get signature for domain: {domain}")
     
     # Step 3: Get backlinks list
-    backlinks = get_backlinks(signature, valid_until, domain)
+    return overview_data, request_backlinks(signature, valid_until, domain)
+
+
+def fetch_backlinks_list(domain: str) -> Optional[Dict[str, Any]]:
+    """
+    Get backlinks list for the specified domain, blocking until done
+    """
+    cached = store.get(("backlinks", domain))
+    if cached is not None:
+        overview_data, table = cached
+        return {
+            "overview": overview_data,
+            "backlinks": table.to_list()
+        }
+
+    overview_data, result = request_domain_backlinks(domain)
+    if result is None:
+        return {
+            "overview": overview_data,
+            "backlinks": None
+        }
+
+    # The compact table only serves later calls, build it once the response is sent
+    backlinks, nofollow = result
+    background.submit(cache_backlinks, domain, overview_data, backlinks, nofollow)
     return {
         "overview": overview_data,
         "backlinks": backlinks
     }
 
 
-@mcp.tool()
-def keyword_generator(keyword: str, country: str = "us", search_engine: str = "Google") -> Optional[List[str]]:
+def cache_backlinks(domain: str, overview_data: Optional[Dict[str, Any]], backlinks: List[Dict[str, Any]],
+                    nofollow: List[Any]) -> None:
     """
-    Get keyword ideas for the specified keyword
+    Store the backlinks of a domain as a compact table
     """
+    table = compact_backlinks(backlinks, nofollow)
+    store.put(("backlinks", domain), (overview_data, table), len(table))
+
+
+def fetch_backlink_profile(domain: str, top: int = 10) -> Optional[Dict[str, Any]]:
+    """
+    Get the aggregated backlink profile of the specified domain, blocking until done
+    """
+    cached = store.get(("backlinks", domain))
+    if cached is not None:
+        overview_data, table = cached
+    else:
+        overview_data, result = request_domain_backlinks(domain)
+        if result is None:
+            return {
+                "overview": overview_data,
+                "profile": None
+            }
+        table = compact_backlinks(*result)
+        store.put(("backlinks", domain), (overview_data, table), len(table))
+
+    return {
+        "overview": overview_data,
+        "profile": summarize_backlinks(table, top)
+    }
+
+
+def fetch_keyword_ideas(keyword: str, country: str = "us", search_engine: str = "Google") -> Optional[List[Any]]:
+    """
+    Get keyword ideas for the specified keyword, blocking until done
+    """
+    cache_key = ("keyword_ideas", keyword, country, search_engine)
+    table = store.get(cache_key)
+    if table is not None:
+        return keyword_ideas_to_list(table)
+
     site_url = f"https://ahrefs.com/keyword-generator/?country={country}&input={urllib.parse.quote(keyword)}"
     token = get_capsolver_token(site_url)
     if not token:
         raise Exception(f"Failed to get verification token for keyword: {keyword}")
-    return get_keyword_ideas(token, keyword, country, search_engine)
+    ideas = request_keyword_ideas(token, keyword, country, search_engine)
+    if ideas is None:
+        return None
+
+    # The compact table only serves later calls, build it once the response is sent
+    background.submit(cache_keyword_ideas, cache_key, keyword, ideas)
+    return keyword_ideas_or_message(ideas)
+
+
+def cache_keyword_ideas(cache_key: Tuple[str, ...], keyword: str, ideas: List[Dict[str, Any]]) -> None:
+    """
+    Store keyword ideas as a compact table and queue them for the keyword index
+    """
+    table = compact_keyword_ideas(ideas)
+    store.put(cache_key, table, len(table))
+    keyword_index.submit_keyword_ideas(keyword, table.records())
+
+
+def fetch_traffic(domain_or_url: str, country: str = "None", mode: Literal["subdomains", "exact"] = "subdomains") -> Optional[Dict[str, Any]]:
+    """
+    Check the estimated search traffic for any website, blocking until done
+    """
+    site_url = f"https://ahrefs.com/traffic-checker/?input={domain_or_url}&mode={mode}"
+    token = get_capsolver_token(site_url)
+    if not token:
+        raise Exception(f"Failed to get verification token for domain: {domain_or_url}")
+    return check_traffic(token, domain_or_url, mode, country)
+
+
+def fetch_keyword_difficulty(keyword: str, country: str = "us") -> Optional[Dict[str, Any]]:
+    """
+    Get keyword difficulty for the specified keyword, blocking until done
+    """
+    site_url = f"https://ahrefs.com/keyword-difficulty/?country={country}&input={urllib.parse.quote(keyword)}"
+    token = get_capsolver_token(site_url)
+    if not token:
+        raise Exception(f"Failed to get verification token for keyword: {keyword}")
+    result = get_keyword_difficulty(token, keyword, country)
+    if result is not None:
+        keyword_index.submit_serp(keyword, country, result)
+    return result
 
 
 @mcp.tool()
-def get_traffic(domain_or_url: str, country: str = "None", mode: Literal["subdomains", "exact"] = "subdomains") -> Optional[Dict[str, Any]]:
-    # return {
-    #     "s":"a"
-    # }
+async def get_backlinks_list(domain: str, ctx: Optional[Context] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get backlinks list for the specified domain
+    Args:
+        domain (str): The domain to query
+    Returns:
+        List of backlinks for the domain, containing title, URL, domain rating, etc.
+    """
+    return await scheduler.run(client_identity(ctx), fetch_backlinks_list, domain)
+
+
+@mcp.tool()
+async def backlink_profile(domain: str, top: Annotated[int, Field(ge=1)] = 10,
+                           ctx: Optional[Context] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get an aggregated backlink profile of the specified domain instead of the full list
+    Args:
+        domain (str): The domain to query
+        top (int): Number of top referring domains and anchors to return, capped at 100
+    Returns:
+        The backlinks overview and a summary of the backlinks: domain rating statistics and
+        distribution, edu/gov shares, dofollow ratio, top referring domains and top anchors
+    """
+    return await scheduler.run(client_identity(ctx), fetch_backlink_profile, domain, top)
+
+
+@mcp.tool()
+async def keyword_generator(keyword: str, country: str = "us", search_engine: str = "Google", ctx: Optional[Context] = None) -> Optional[List[Any]]:
+    """
+    Get keyword ideas for the specified keyword
+    """
+    return await scheduler.run(client_identity(ctx), fetch_keyword_ideas, keyword, country, search_engine)
+
+
+@mcp.tool()
+async def get_traffic(domain_or_url: str, country: str = "None", mode: Literal["subdomains", "exact"] = "subdomains", ctx: Optional[Context] = None) -> Optional[Dict[str, Any]]:
     """
     Check the estimated search traffic for any website. 
 
@@ -129,29 +270,143 @@ def get_traffic(domain_or_url: str, country: str = "None", mode: Literal["subdom
     Returns:
         Traffic data for the specified domain or URL
     """
-    site_url = f"https://ahrefs.com/traffic-checker/?input={domain_or_url}&mode={mode}"
-    token = get_capsolver_token(site_url)
-    if not token:
-        raise Exception(f"Failed to get verification token for domain: {domain_or_url}")
-    return check_traffic(token, domain_or_url, mode, country)
+    return await scheduler.run(client_identity(ctx), fetch_traffic, domain_or_url, country, mode)
 
 
 @mcp.tool()
-def keyword_difficulty(keyword: str, country: str = "us") -> Optional[Dict[str, Any]]:
+async def keyword_difficulty(keyword: str, country: str = "us", ctx: Optional[Context] = None) -> Optional[Dict[str, Any]]:
     """
     Get keyword difficulty for the specified keyword
     """
-    site_url = f"https://ahrefs.com/keyword-difficulty/?country={country}&input={urllib.parse.quote(keyword)}"
-    token = get_capsolver_token(site_url)
-    if not token:
-        raise Exception(f"Failed to get verification token for keyword: {keyword}")
-    return get_keyword_difficulty(token, keyword, country)
+    return await scheduler.run(client_identity(ctx), fetch_keyword_difficulty, keyword, country)
+
+
+@mcp.tool()
+async def search_known_keywords(
+    query: str = "",
+    mode: Literal["prefix", "phrase", "fts"] = "prefix",
+    source: Literal["all", "ideas", "serp"] = "all",
+    country: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    volume: Optional[str] = None,
+    min_domain_rating: Optional[float] = None,
+    max_domain_rating: Optional[float] = None,
+    min_traffic: Optional[int] = None,
+    max_position: Optional[int] = None,
+    max_difficulty: Optional[int] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """
+    Search keywords and SERP results already fetched by keyword_generator and
+    keyword_difficulty, without querying Ahrefs again
+
+    Args:
+        query (str): Words to look for, empty to list the latest rows matching the filters
+        mode (["prefix", "phrase", "fts"]): "prefix" matches words starting with each query word,
+            "phrase" matches the exact phrase, "fts" takes raw SQLite FTS5 query syntax
+        source (["all", "ideas", "serp"]): Search keyword ideas, SERP results or both
+        country (str): Only return rows for this country code
+        difficulty (str): Only return keyword ideas with this difficulty label, e.g. "Easy"
+        volume (str): Only return keyword ideas with this volume label, e.g. "1K-10K"
+        min_domain_rating (float): Minimum domain rating of SERP results
+        max_domain_rating (float): Maximum domain rating of SERP results
+        min_traffic (int): Minimum traffic of SERP results
+        max_position (int): Maximum SERP position
+        max_difficulty (int): Maximum keyword difficulty of the SERP the result was found in
+        limit (int): Maximum rows returned per source
+    Returns:
+        Matching keyword ideas and SERP results, best matches first
+    """
+    def search() -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        if source in ("all", "ideas"):
+            result["ideas"] = keyword_index.search_keyword_ideas(
+                query, mode, country=country, difficulty=difficulty, volume=volume, limit=limit)
+        if source in ("all", "serp"):
+            result["serp"] = keyword_index.search_serp(
+                query, mode, country=country, min_domain_rating=min_domain_rating,
+                max_domain_rating=max_domain_rating, min_traffic=min_traffic, max_position=max_position,
+                max_difficulty=max_difficulty, limit=limit)
+        return result
+
+    try:
+        return await asyncio.to_thread(search)
+    except sqlite3.OperationalError as e:
+        raise Exception(f"Invalid search query: {query} ({e})")
+
+
+# Job arguments are validated against the parameters of the matching tool
+jobs.register("get_backlinks_list", fetch_backlinks_list, get_backlinks_list.fn)
+jobs.register("backlink_profile", fetch_backlink_profile, backlink_profile.fn)
+jobs.register("keyword_generator", fetch_keyword_ideas, keyword_generator.fn)
+jobs.register("get_traffic", fetch_traffic, get_traffic.fn)
+jobs.register("keyword_difficulty", fetch_keyword_difficulty, keyword_difficulty.fn)
+
+
+@mcp.tool()
+async def submit_job(tool: Literal["get_backlinks_list", "backlink_profile", "keyword_generator", "get_traffic",
+                                   "keyword_difficulty"],
+                     args: Optional[Dict[str, Any]] = None, ctx: Optional[Context] = None) -> Dict[str, Any]:
+    """
+    Run a tool in the background and return a job id right away, for calls that
+    may outlast the client timeout
+
+    Args:
+        tool (str): Name of the tool to run
+        args (dict): Arguments of the tool, e.g. {"domain": "example.com"}
+    Returns:
+        The job status, with the job id to pass to job_status and job_result.
+        Submitting the same call again returns the job already queued or finished
+    """
+    return await asyncio.to_thread(jobs.submit, tool, args, client_identity(ctx))
+
+
+@mcp.tool()
+async def job_status(job_id: str) -> Dict[str, Any]:
+    """
+    Get the status of a job submitted with submit_job
+
+    Args:
+        job_id (str): Id returned by submit_job
+    Returns:
+        The job status: "pending", "running", "done" or "failed", with the error of a failed job
+    """
+    return await asyncio.to_thread(jobs.status, job_id)
+
+
+@mcp.tool()
+async def job_result(job_id: str, wait: float = 0) -> Dict[str, Any]:
+    """
+    Get the result of a job submitted with submit_job
+
+    Args:
+        job_id (str): Id returned by submit_job
+        wait (float): Seconds to wait for the job to finish before returning, 0 to return at once
+    Returns:
+        The job status, with the result of the tool under "result" once the job is done
+    """
+    future = jobs.future(job_id)
+    if future is not None and wait > 0:
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), wait)
+        except asyncio.TimeoutError:
+            pass
+    return await asyncio.to_thread(jobs.result, job_id)
 
 
 def main():
     """Run the MCP server"""
-    # mcp.run()
-    mcp.run(transport="streamable-http", host="0.0.0.0", port=8010)
+    jobs.start()
+    # uvicorn raises SIGTERM again once it has shut down, leave through the finally below instead of being killed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    try:
+        # mcp.run()
+        mcp.run(transport="streamable-http", host="0.0.0.0", port=8010)
+    finally:
+        # Write the cache fills and index rows still queued before the daemon thread is killed
+        background.flush()
+        keyword_index.close()
+        jobs.close()
 
 
 if __name__ == "__main__":
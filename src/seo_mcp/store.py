@@ -0,0 +1,285 @@
+"""
+Memory-compact in-process store for backlink and keyword results
+
+Cached results are kept column by column instead of as one dict per row.
+Low-cardinality fields (domain ratings, flags, country codes, labels, dates,
+anchors) are dictionary encoded into arrays of small integer codes, and
+high-cardinality text (titles, URLs, keywords) is packed as UTF-8 into one
+buffer with an offsets array. Rows are turned back into the usual dicts only
+when a result is returned to a client.
+"""
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, islice
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from seo_mcp.config import CACHE_MAX_ROWS, CACHE_TTL
+
+
+DICT = "dict"
+TEXT = "text"
+
+# Code array type codes, widened when a column outgrows them
+_CODE_TYPES = (("B", 1 << 8), ("H", 1 << 16), ("I", 1 << 32))
+
+
+class DictColumn:
+    """
+    Dictionary encoded column: distinct values once, one small code per row
+    """
+    __slots__ = ("codes", "values", "_index", "_limit")
+
+    def __init__(self):
+        self.codes = array(_CODE_TYPES[0][0])
+        self._limit = _CODE_TYPES[0][1]
+        self.values: List[Any] = []
+        self._index: Optional[Dict[type, Dict[Hashable, int]]] = {}
+
+    def append(self, value: Any) -> None:
+        self.extend((value,))
+
+    def extend(self, values: Sequence[Any]) -> None:
+        types = set(map(type, values))
+        if len(types) > 1:
+            for value in values:
+                self.extend((value,))
+            return
+        if not types:
+            return
+
+        # One index per type keeps True, 1 and 1.0 apart so values decode with their original type
+        index = self._index.setdefault(types.pop(), {})
+        table = self.values
+        fresh = list(dict.fromkeys(values).keys() - index.keys())
+        index.update(zip(fresh, range(len(table), len(table) + len(fresh))))
+        table.extend(fresh)
+        while len(table) > self._limit:
+            self._widen()
+        self.codes.extend(list(map(index.__getitem__, values)))
+
+    def _widen(self) -> None:
+        for typecode, limit in _CODE_TYPES:
+            if limit > self._limit:
+                self.codes = array(typecode, self.codes)
+                self._limit = limit
+                return
+
+    def freeze(self) -> None:
+        # The reverse index is only needed while appending
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> Any:
+        return self.values[self.codes[row]]
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self.values.__getitem__, self.codes)
+
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes)
+
+
+class TextColumn:
+    """
+    Strings packed as UTF-8 into a single buffer, sliced by an offsets array
+    """
+    __slots__ = ("data", "offsets", "others")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+        # Rows whose value is not a string, e.g. a null title
+        self.others: Dict[int, Any] = {}
+
+    def append(self, value: Any) -> None:
+        self.extend((value,))
+
+    def extend(self, values: Sequence[Any]) -> None:
+        if set(map(type, values)) <= {str}:
+            encoded = list(map(str.encode, values))
+        else:
+            encoded = []
+            for row, value in enumerate(values, len(self)):
+                if type(value) is str:
+                    encoded.append(value.encode("utf-8"))
+                else:
+                    self.others[row] = value
+                    encoded.append(b"")
+        self.offsets.extend(islice(accumulate(map(len, encoded), initial=self.offsets[-1]), 1, None))
+        self.data += b"".join(encoded)
+
+    def freeze(self) -> None:
+        self.data = bytes(self.data)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> Any:
+        if row in self.others:
+            return self.others[row]
+        return self.data[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[Any]:
+        data, offsets, others = self.data, self.offsets, self.others
+        if data.isascii():
+            # Byte offsets are character offsets, decode the buffer once
+            data = data.decode("ascii")
+            values = (data[start:end] for start, end in zip(offsets, islice(offsets, 1, None)))
+        else:
+            values = (data[start:end].decode("utf-8") for start, end in zip(offsets, islice(offsets, 1, None)))
+        if not others:
+            return values
+        return (others[row] if row in others else value for row, value in enumerate(values))
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class CompactTable:
+    """
+    Column store with a fixed schema of ``(name, DICT | TEXT)`` pairs
+    """
+    COLUMNS: Sequence[Tuple[str, str]] = ()
+
+    def __init__(self):
+        self.names = tuple(name for name, _ in self.COLUMNS)
+        self.columns = tuple(DictColumn() if kind == DICT else TextColumn() for _, kind in self.COLUMNS)
+
+    def append(self, values: Sequence[Any]) -> None:
+        for column, value in zip(self.columns, values):
+            column.append(value)
+
+    def extend_columns(self, columns: Sequence[Sequence[Any]]) -> None:
+        """
+        Append many rows at once, given as one sequence of values per column
+        """
+        for column, values in zip(self.columns, columns):
+            column.extend(values)
+
+    def freeze(self) -> "CompactTable":
+        for column in self.columns:
+            column.freeze()
+        return self
+
+    def column(self, name: str) -> Any:
+        return self.columns[self.names.index(name)]
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def records(self) -> Iterable[Tuple[Any, ...]]:
+        return zip(*self.columns)
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        names = self.names
+        for values in self.records():
+            yield dict(zip(names, values))
+
+    def to_list(self) -> List[Any]:
+        return list(self.rows())
+
+    def nbytes(self) -> int:
+        """
+        Approximate size of the encoded columns, excluding the dictionaries
+        """
+        return sum(column.nbytes() for column in self.columns)
+
+
+class BacklinkTable(CompactTable):
+    """
+    Backlinks in the shape returned by ``format_backlinks``
+    """
+    COLUMNS = (
+        ("anchor", DICT),
+        ("domainRating", DICT),
+        ("title", TEXT),
+        ("urlFrom", TEXT),
+        ("urlTo", DICT),
+        ("edu", DICT),
+        ("gov", DICT),
+        # Not returned with the rows, only aggregated by summarize_backlinks
+        ("nofollow", DICT),
+    )
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        names = self.names[:-1]
+        for values in zip(*self.columns[:-1]):
+            yield dict(zip(names, values))
+
+
+class KeywordIdeaTable(CompactTable):
+    """
+    Keyword ideas in the shape returned by ``format_keyword_ideas``
+    """
+    COLUMNS = (
+        ("label", DICT),
+        ("keyword", TEXT),
+        ("country", DICT),
+        ("difficulty", DICT),
+        ("volume", DICT),
+        ("updatedAt", DICT),
+    )
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        names = self.names[1:]
+        for label, *values in self.records():
+            yield {"label": label, "value": dict(zip(names, values))}
+
+
+class ResultStore:
+    """
+    Thread-safe LRU cache of results with a TTL and a budget in cached rows
+
+    Args:
+        ttl: Seconds a result stays valid
+        max_rows: Total rows kept before the least recently used results are evicted
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_rows: int = CACHE_MAX_ROWS):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.rows = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, value = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, rows: int = 0) -> None:
+        if self.ttl <= 0 or rows > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + self.ttl, rows, value)
+            self.rows += rows
+            while self.rows > self.max_rows and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.rows = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        _, rows, _ = self._entries.pop(key)
+        self.rows -= rows
+
+
+store = ResultStore()
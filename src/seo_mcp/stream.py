@@ -0,0 +1,238 @@
+"""
+Incremental JSON decoding of streamed upstream responses
+
+``load`` decodes a document from an iterable of byte chunks, such as
+``response.iter_content()``, while it is being received. The arrays at the
+given paths are decoded one row at a time and every row is passed through a
+function, such as the formatter of that row, while the rest of the body is
+still being received, so neither the response body nor the raw rows of large
+arrays are held in memory. Everything else is decoded in one piece with the
+standard library decoder.
+"""
+import codecs
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+# Bytes read from the socket at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_SPACE = re.compile(r"[ \t\n\r]*")
+
+# Characters that can follow a complete value
+_DELIMITERS = frozenset(_WHITESPACE + ",:]}")
+
+Path = Tuple[Any, ...]
+RowFunction = Optional[Callable[[Any], Any]]
+
+
+class JsonStream:
+    """
+    Pull parser over a JSON document received as byte chunks
+
+    Args:
+        chunks: Bytes of the document, in order
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = 1) -> None:
+        # Read at least `size` more characters, dropping what was already consumed
+        parts = [self.buffer[self.pos:]]
+        read = 0
+        while read < size and not self.eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.eof = True
+                text = self._text.decode(b"", final=True)
+            else:
+                text = self._text.decode(chunk)
+            parts.append(text)
+            read += len(text)
+        self.buffer = "".join(parts)
+        self.pos = 0
+
+    def peek(self) -> str:
+        """
+        Return the next non-whitespace character without consuming it, or "" at the end
+        """
+        while True:
+            buffer, pos = self.buffer, self.pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def _next(self) -> str:
+        char = self.peek()
+        if not char:
+            raise json.JSONDecodeError("Unexpected end of document", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def _expect(self, char: str) -> None:
+        if self._next() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos - 1)
+
+    def value(self) -> Any:
+        """
+        Decode the next complete value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number cut by the end of a chunk decodes as a shorter number, only
+                # accept a value once the character after it is received
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            # Grow the buffer geometrically so a large value is not decoded over and over
+            self._fill(max(len(self.buffer) - self.pos, 1))
+
+    def items(self) -> Iterator[None]:
+        """
+        Step through an array, the caller consuming one element per iteration
+        """
+        self._expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            char = self._next()
+            if char == "]":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, self.pos - 1)
+
+    def members(self) -> Iterator[str]:
+        """
+        Step through an object, yielding each key; the caller consumes the value
+        """
+        self._expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            char = self._next()
+            if char == "}":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, self.pos - 1)
+
+    def rows(self, row: RowFunction = None) -> Iterator[Any]:
+        """
+        Decode an array one element at a time, passing each element through `row`
+        exactly once and in order
+        """
+        self._expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        decode, skip = self._decoder.raw_decode, _SPACE.match
+        while True:
+            buffer = self.buffer
+            size = len(buffer)
+            pos = skip(buffer, self.pos).end()
+            values: List[Any] = []
+            closed = False
+
+            # Decode the rows up to the last "}," of the buffer in one call, which shares the
+            # keys between rows like json.loads. If the cut falls inside a string the
+            # decode fails and the rows are decoded one by one below instead
+            cut = buffer.rfind("},", pos)
+            if cut > pos:
+                try:
+                    batch = json.loads("[" + buffer[pos:cut + 1] + "]")
+                except json.JSONDecodeError:
+                    pass
+                else:
+                    values.extend(batch if row is None else map(row, batch))
+                    pos = skip(buffer, cut + 2).end()
+
+            # Decode the rows left in the buffer one at a time
+            while True:
+                try:
+                    value, end = decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break
+                end = skip(buffer, end).end()
+                if end >= size or buffer[end] not in ",]":
+                    break
+                values.append(value if row is None else row(value))
+                pos = skip(buffer, end + 1).end()
+                if buffer[end] == "]":
+                    closed = True
+                    break
+            self.pos = pos
+            yield from values
+            del values
+            if closed:
+                return
+
+            # The next row runs past the end of the buffer, read on and decode it in the
+            # loops above again; only the last row is left to the checks of value()
+            if not self.eof:
+                self._fill(max(len(self.buffer) - self.pos, 1))
+                continue
+            value = self.value()
+            yield value if row is None else row(value)
+            char = self._next()
+            if char == "]":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, self.pos - 1)
+
+
+def load(chunks: Iterable[bytes], arrays: Dict[Path, RowFunction]) -> Any:
+    """
+    Decode a JSON document while it is received
+
+    Args:
+        chunks: Bytes of the document, e.g. response.iter_content(STREAM_CHUNK_SIZE)
+        arrays: Paths of the arrays to decode row by row, as tuples of object keys
+                and array indexes, mapped to a function applied to every row or None
+
+    Returns:
+        The decoded document, in the same shape as json.loads would return
+    """
+    stream = JsonStream(chunks)
+    prefixes: Set[Path] = {path[:i] for path in arrays for i in range(len(path))}
+    document = _load_value(stream, (), arrays, prefixes)
+    # Read the rest of the stream; as with json.loads, only whitespace may follow the document
+    if stream.peek():
+        raise json.JSONDecodeError("Extra data", stream.buffer, stream.pos)
+    return document
+
+
+def _load_value(stream: JsonStream, path: Path, arrays: Dict[Path, RowFunction], prefixes: Set[Path]) -> Any:
+    char = stream.peek()
+    if path in arrays and char == "[":
+        return list(stream.rows(arrays[path]))
+    if path in prefixes:
+        if char == "{":
+            return {key: _load_value(stream, path + (key,), arrays, prefixes) for key in stream.members()}
+        if char == "[":
+            return [_load_value(stream, path + (index,), arrays, prefixes)
+                    for index, _ in enumerate(stream.items())]
+    return stream.value()
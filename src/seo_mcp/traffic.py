@@ -6,6 +6,31 @@ from typing import Optional, Dict, Any, Literal, List
 import requests
 import json
 
+from seo_mcp.config import AHREFS_API_BASE
+from seo_mcp.stream import STREAM_CHUNK_SIZE, load
+
+
+def format_traffic(data: List[Any]) -> Dict[str, Any]:
+    """
+    Format traffic overview data
+    """
+    # 提取有效数据
+    traffic_data = data[1]
+    
+    # 格式化返回结果
+    result = {
+        "traffic_history": traffic_data.get("traffic_history", []),
+        "traffic": {
+            "trafficMonthlyAvg": traffic_data.get("traffic", {}).get("trafficMonthlyAvg", 0),
+            "costMontlyAvg": traffic_data.get("traffic", {}).get("costMontlyAvg", 0)
+        },
+        "top_pages": traffic_data.get("top_pages", []),
+        "top_countries": traffic_data.get("top_countries", []),
+        "top_keywords": traffic_data.get("top_keywords", [])
+    }
+    
+    return result
+
 
 def check_traffic(token: str, domain_or_url: str, mode: Literal["subdomains", "exact"] = "subdomains", country: str = "None") -> Optional[Dict[str, Any]]:
     """
@@ -23,7 +48,7 @@ def check_traffic(token: str, domain_or_url: str, mode: Literal["subdomains", "e
     if not token:
         return None
     
-    url = "https://ahrefs.com/v4/stGetFreeTrafficOverview"
+    url = f"{AHREFS_API_BASE}/stGetFreeTrafficOverview"
     
     # 将参数转换为JSON字符串，然后作为单个input参数传递
     params = {
@@ -43,31 +68,20 @@ def check_traffic(token: str, domain_or_url: str, mode: Literal["subdomains", "e
     }
 
     try:
-        response = requests.get(url, params=params, headers=headers)
-        if response.status_code != 200:
-            return None
-        
-        data: Optional[List[Any]] = response.json()
+        with requests.get(url, params=params, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                return None
+
+            # Decode the top pages and keywords one by one while they are received
+            data: Optional[List[Any]] = load(response.iter_content(STREAM_CHUNK_SIZE), {
+                (1, "top_pages"): None,
+                (1, "top_keywords"): None,
+            })
 
         # 检查响应数据格式
         if not isinstance(data, list) or len(data) < 2 or data[0] != "Ok":
             return None
         
-        # 提取有效数据
-        traffic_data = data[1]
-        
-        # 格式化返回结果
-        result = {
-            "traffic_history": traffic_data.get("traffic_history", []),
-            "traffic": {
-                "trafficMonthlyAvg": traffic_data.get("traffic", {}).get("trafficMonthlyAvg", 0),
-                "costMontlyAvg": traffic_data.get("traffic", {}).get("costMontlyAvg", 0)
-            },
-            "top_pages": traffic_data.get("top_pages", []),
-            "top_countries": traffic_data.get("top_countries", []),
-            "top_keywords": traffic_data.get("top_keywords", [])
-        }
-        
-        return result
+        return format_traffic(data)
     except Exception as e:
         return None
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Regression tests for the incremental JSON decoder
+
+Run with ``python -m unittest discover tests``. Every document is fed to load
+in chunks of several sizes, so the values and rows cut by a chunk boundary are
+covered, and the result is compared with json.loads of the whole document.
+"""
+import json
+import unittest
+from typing import Any, Iterator, List
+
+from seo_mcp.stream import load
+
+
+CHUNK_SIZES = (1, 2, 3, 7, 64, 1000, 65536)
+
+ROWS = {(1, "rows"): None}
+
+
+def chunks(data: bytes, size: int) -> Iterator[bytes]:
+    return (data[start:start + size] for start in range(0, len(data), size))
+
+
+def encode(document: Any, indent: Any = None) -> bytes:
+    return json.dumps(document, indent=indent, ensure_ascii=False).encode("utf-8")
+
+
+class LoadTest(unittest.TestCase):
+
+    def assertLoads(self, data: bytes, arrays=ROWS) -> None:
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                self.assertEqual(load(chunks(data, size), arrays), json.loads(data))
+
+    def assertRejects(self, data: bytes, message: str = None, arrays=ROWS) -> None:
+        with self.assertRaises(json.JSONDecodeError):
+            json.loads(data)
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                with self.assertRaises(json.JSONDecodeError) as raised:
+                    load(chunks(data, size), arrays)
+                if message is not None:
+                    self.assertEqual(raised.exception.msg, message)
+
+    def test_document_shapes(self):
+        documents = [
+            ["Ok", {"rows": [{"a": 1, "b": [1, 2.5e3, -0.0, True, None]}] * 50, "total": 50}],
+            ["Ok", {"rows": [], "other": {"rows": [1, 2]}}],
+            ["Ok", {"rows": [1, "two", None, [3], {"four": 4}]}],
+            ["Ok", {}],
+            ["Ok"],
+            [],
+            {},
+            12345,
+            "text",
+        ]
+        for document in documents:
+            for indent in (None, 2):
+                self.assertLoads(encode(document, indent))
+
+    def test_multibyte_characters_split_across_chunks(self):
+        self.assertLoads(encode(["Ok", {"rows": [{"title": "é☃𝄞 ünïcödé"}] * 20}]))
+
+    def test_delimiters_inside_strings(self):
+        # The rows decoded in one call end at the last "}," of the buffer, which here
+        # often falls inside a string and must not be taken for the end of a row
+        rows = [
+            {"a": 'x},{"b": 1}, "q'},
+            {"a": "},"},
+            {"a": [{"n": 1}, {"n": 2}]},
+            {"a": "}, ]", "b": "\\\"},"},
+        ]
+        document = ["Ok", {"rows": rows * 100, "tail": 5}]
+        for indent in (None, 2):
+            self.assertLoads(encode(document, indent))
+
+    def test_numbers_cut_at_chunk_end(self):
+        document = ["Ok", {"rows": list(range(-500, 500)) + [1.5e10, 2.25, 123456789], "total": 1003}]
+        self.assertLoads(encode(document))
+        self.assertLoads(b"123456789")
+        self.assertLoads(b'["Ok", {"rows": [{"a": 1}, 123456789]}]')
+
+    def test_row_function_sees_each_row_once_in_order(self):
+        rows = [{"n": n, "s": "}," * (n % 3)} for n in range(300)]
+        data = encode(["Ok", {"rows": rows}])
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                seen: List[int] = []
+
+                def row(value: Any) -> Any:
+                    seen.append(value["n"])
+                    return value["n"] * 2
+
+                document = load(chunks(data, size), {(1, "rows"): row})
+                self.assertEqual(seen, list(range(300)))
+                self.assertEqual(document, ["Ok", {"rows": [n * 2 for n in range(300)]}])
+
+    def test_invalid_documents(self):
+        for data in (
+            b'["Ok", {"rows": [{"a": 1},]}]',
+            b'["Ok", {"rows": [{"a": 1}],}]',
+            b'["Ok", {"rows": [1, 2,]}]',
+            b'["Ok", {"rows": [1 2]}]',
+            b'["Ok", {"rows": [tru]}]',
+            b'["Ok", {"rows": [1, 2',
+            b'["Ok", {"rows": [{"a": "unterminated}]}]',
+            b'',
+        ):
+            with self.subTest(data=data):
+                self.assertRejects(data)
+
+    def test_extra_data(self):
+        for data in (b'["Ok"] x', b'{} {}', b'12 34', b'[1]]', b'"a" ,', b'["Ok", {"rows": [1]}] []'):
+            with self.subTest(data=data):
+                self.assertRejects(data, "Extra data")
+        for data in (b'["Ok"]  \n', b'{} ', b'12\n'):
+            with self.subTest(data=data):
+                self.assertLoads(data)
+
+
+if __name__ == "__main__":
+    unittest.main()